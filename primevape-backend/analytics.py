@@ -0,0 +1,283 @@
+"""
+Sales rollups behind /api/admin/analytics
+
+Every order write that changes what counts as a sale (create, cancel,
+un-cancel, delete) adds or subtracts the order from two rollup tables in the
+same transaction:
+
+- sales_hourly: order count, units and revenue per hour
+- product_sales_daily: order count, units and revenue per product per day
+- category_sales_daily: the same per category per day, counting an order
+  once however many of its products share the category
+
+Orders are bucketed by their creation time, so cancelling an order removes
+it from the period it was placed in. Reports sum rollup rows into
+day/week/month periods, so a year-long chart reads at most 8760 hourly rows
+instead of scanning order_items. rebuild_rollups() recomputes every table
+from scratch.
+"""
+
+from datetime import datetime, date, timedelta
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Order, OrderItem, Product, SalesHourly, ProductSalesDaily, CategorySalesDaily
+
+INTERVALS = ('day', 'week', 'month')
+
+
+def _insert(model):
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def _upsert(model, keys, values, insert_only=None):
+    """Add values to the counters of the row identified by keys
+
+    Columns in insert_only are written when the row is created and left
+    alone afterwards.
+    """
+    table = model.__table__
+    stmt = _insert(model).values(**keys, **values, **(insert_only or {}))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={name: table.c[name] + stmt.excluded[name] for name in values}
+    )
+    db.session.execute(stmt)
+
+
+def hour_bucket(moment):
+    """Start of the hour containing moment"""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def record_order_sales(order, lines=None, sign=1):
+    """Add (sign=1) or remove (sign=-1) an order from the rollups
+
+    lines is a list of (product_id, quantity, price); it defaults to the
+    order's items.
+    """
+    if lines is None:
+        lines = [(item.product_id, item.quantity, item.price) for item in order.items]
+
+    created_at = order.created_at or datetime.utcnow()
+    units = sum(quantity for _, quantity, _ in lines)
+
+    _upsert(SalesHourly, {'bucket': hour_bucket(created_at)}, {
+        'order_count': sign,
+        'units': sign * units,
+        'revenue': sign * order.total
+    })
+
+    per_product = {}
+    for product_id, quantity, price in lines:
+        line_units, line_revenue = per_product.get(product_id, (0, 0.0))
+        per_product[product_id] = (line_units + quantity, line_revenue + quantity * price)
+
+    categories = dict(
+        db.session.query(Product.id, Product.category)
+        .filter(Product.id.in_(per_product))
+    ) if per_product else {}
+
+    per_category = {}
+    for product_id, (line_units, line_revenue) in per_product.items():
+        _upsert(ProductSalesDaily, {
+            'day': created_at.date(),
+            'product_id': product_id
+        }, {
+            'order_count': sign,
+            'units': sign * line_units,
+            'revenue': sign * line_revenue
+        }, insert_only={'category': categories.get(product_id)})
+
+        category = categories.get(product_id)
+        if category is not None:
+            category_units, category_revenue = per_category.get(category, (0, 0.0))
+            per_category[category] = (category_units + line_units, category_revenue + line_revenue)
+
+    for category, (category_units, category_revenue) in per_category.items():
+        _upsert(CategorySalesDaily, {
+            'day': created_at.date(),
+            'category': category
+        }, {
+            'order_count': sign,
+            'units': sign * category_units,
+            'revenue': sign * category_revenue
+        })
+
+
+def record_status_change(order, old_status, new_status):
+    """Add or remove an order from the rollups when it is (un)cancelled"""
+    sign = (old_status == 'cancelled') - (new_status == 'cancelled')
+    if sign:
+        record_order_sales(order, sign=sign)
+
+
+def period_start(day, interval):
+    """First day of the day/week/month period containing day"""
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _totals(order_count, units, revenue):
+    return {
+        'orders': order_count,
+        'units': units,
+        'revenue': round(revenue, 2) or 0.0,
+        'average_order_value': round(revenue / order_count, 2) if order_count else 0.0
+    }
+
+
+def sales_report(start, end, interval='day', limit=20):
+    """Revenue, orders, units and AOV for [start, end] by period, category and product"""
+    periods = {}
+    hourly = db.session.query(SalesHourly).filter(
+        SalesHourly.bucket >= datetime.combine(start, datetime.min.time()),
+        SalesHourly.bucket < datetime.combine(end + timedelta(days=1), datetime.min.time())
+    )
+    for row in hourly:
+        # Rows cancelled back to zero are kept but not reported
+        if not row.order_count:
+            continue
+        key = period_start(row.bucket.date(), interval)
+        order_count, units, revenue = periods.get(key, (0, 0, 0.0))
+        periods[key] = (order_count + row.order_count, units + row.units, revenue + row.revenue)
+
+    categories = {
+        category: (order_count, units, revenue)
+        for category, order_count, units, revenue in db.session.query(
+            CategorySalesDaily.category,
+            db.func.sum(CategorySalesDaily.order_count),
+            db.func.sum(CategorySalesDaily.units),
+            db.func.sum(CategorySalesDaily.revenue)
+        ).filter(
+            CategorySalesDaily.day >= start,
+            CategorySalesDaily.day <= end
+        ).group_by(CategorySalesDaily.category)
+        if order_count
+    }
+
+    products = {
+        product_id: (order_count, units, revenue)
+        for product_id, order_count, units, revenue in db.session.query(
+            ProductSalesDaily.product_id,
+            db.func.sum(ProductSalesDaily.order_count),
+            db.func.sum(ProductSalesDaily.units),
+            db.func.sum(ProductSalesDaily.revenue)
+        ).filter(
+            ProductSalesDaily.day >= start,
+            ProductSalesDaily.day <= end
+        ).group_by(ProductSalesDaily.product_id)
+        if order_count
+    }
+
+    top_products = sorted(products.items(), key=lambda kv: -kv[1][2])[:limit]
+    names = dict(
+        db.session.query(Product.id, Product.name)
+        .filter(Product.id.in_([product_id for product_id, _ in top_products]))
+    ) if top_products else {}
+
+    return {
+        'interval': interval,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'totals': _totals(*[sum(p[i] for p in periods.values()) for i in range(3)]),
+        'series': [
+            {'period': key.isoformat(), **_totals(*values)}
+            for key, values in sorted(periods.items())
+        ],
+        'by_category': [
+            {'category': category, **_totals(*values)}
+            for category, values in sorted(categories.items(), key=lambda kv: -kv[1][2])
+        ],
+        'by_product': [
+            {'product_id': product_id, 'product_name': names.get(product_id), **_totals(*values)}
+            for product_id, values in top_products
+        ]
+    }
+
+
+def rebuild_rollups(batch_size=1000):
+    """Recompute every rollup table from orders and order items and commit
+
+    Returns the number of (hourly, product-day, category-day) rows written.
+    """
+    db.session.query(SalesHourly).delete()
+    db.session.query(ProductSalesDaily).delete()
+    db.session.query(CategorySalesDaily).delete()
+
+    hourly = {}
+    daily = {}
+    category_daily = {}
+    categories = dict(db.session.query(Product.id, Product.category))
+
+    rows = db.session.query(
+        Order.id, Order.created_at, Order.total,
+        OrderItem.product_id, OrderItem.quantity, OrderItem.price
+    ).outerjoin(OrderItem, OrderItem.order_id == Order.id)\
+        .filter(Order.status != 'cancelled')\
+        .order_by(Order.id)\
+        .execution_options(yield_per=batch_size)
+
+    last_order_id = None
+    for order_id, created_at, total, product_id, quantity, price in rows:
+        created_at = created_at or datetime.utcnow()
+        bucket = hourly.setdefault(hour_bucket(created_at), [0, 0, 0.0])
+        if order_id != last_order_id:
+            bucket[0] += 1
+            bucket[2] += total
+            last_order_id = order_id
+            seen_products = set()
+            seen_categories = set()
+        if product_id is None:
+            continue
+
+        bucket[1] += quantity
+        key = (created_at.date(), product_id)
+        entry = daily.setdefault(key, [0, 0, 0.0])
+        if product_id not in seen_products:
+            entry[0] += 1
+            seen_products.add(product_id)
+        entry[1] += quantity
+        entry[2] += quantity * price
+
+        category = categories.get(product_id)
+        if category is None:
+            continue
+        entry = category_daily.setdefault((created_at.date(), category), [0, 0, 0.0])
+        if category not in seen_categories:
+            entry[0] += 1
+            seen_categories.add(category)
+        entry[1] += quantity
+        entry[2] += quantity * price
+
+    if hourly:
+        db.session.execute(insert(SalesHourly), [
+            {'bucket': bucket, 'order_count': c, 'units': u, 'revenue': r}
+            for bucket, (c, u, r) in hourly.items()
+        ])
+    if daily:
+        db.session.execute(insert(ProductSalesDaily), [
+            {'day': day, 'product_id': product_id, 'category': categories.get(product_id),
+             'order_count': c, 'units': u, 'revenue': r}
+            for (day, product_id), (c, u, r) in daily.items()
+        ])
+    if category_daily:
+        db.session.execute(insert(CategorySalesDaily), [
+            {'day': day, 'category': category, 'order_count': c, 'units': u, 'revenue': r}
+            for (day, category), (c, u, r) in category_daily.items()
+        ])
+    db.session.commit()
+    return len(hourly), len(daily), len(category_daily)
+
+
+def parse_range(args, default_days=30):
+    """Read start/end (YYYY-MM-DD) from request args, defaulting to the last default_days"""
+    end = date.fromisoformat(args['end']) if args.get('end') else datetime.utcnow().date()
+    start = date.fromisoformat(args['start']) if args.get('start') else end - timedelta(days=default_days - 1)
+    if start > end:
+        raise ValueError('start must be on or before end')
+    return start, end
@@ -1,9 +1,18 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from sqlalchemy import text
 from config import config
-from models import db, bcrypt
+from models import db, bcrypt, hasher
+from cache import catalog_cache
+from search import search_index
+from query_stats import query_stats
+from metrics import metrics
+from compression import compression
+import auth_utils
+import json_provider
 import os
+import time
 
 def create_app(config_name='development'):
     """Application factory"""
@@ -11,16 +20,24 @@ def create_app(config_name='development'):
 
     # Load configuration
     app.config.from_object(config[config_name])
+    json_provider.init_app(app)
 
     # Initialize extensions
     db.init_app(app)
     bcrypt.init_app(app)
+    hasher.init_app(app)
+    catalog_cache.init_app(app)
+    search_index.init_app(app)
+    query_stats.init_app(app)
+    metrics.init_app(app)
+    compression.init_app(app)
 
     # Configure JWT to not use CSRF protection
     app.config['JWT_COOKIE_CSRF_PROTECT'] = False
     app.config['JWT_TOKEN_LOCATION'] = ['headers']
 
     jwt = JWTManager(app)
+    auth_utils.init_app(app)
 
     # Configure CORS - Allow all origins
     CORS(app,
@@ -60,7 +77,42 @@ def create_app(config_name='development'):
     # Health check endpoint
     @app.route('/health')
     def health():
-        return jsonify({'status': 'healthy'}), 200
+        pool = db.engine.pool
+        database = {'pool': {
+            # Only QueuePool reports sizes; SQLite's pools may not
+            name: max(getattr(pool, reading)(), 0)
+            for name, reading in (
+                ('size', 'size'), ('checked_out', 'checkedout'),
+                ('overflow', 'overflow'), ('idle', 'checkedin')
+            )
+            if hasattr(pool, reading)
+        }}
+        try:
+            started = time.perf_counter()
+            with db.engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+            database['status'] = 'ok'
+            database['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        except Exception:
+            # Driver errors name the host and user; keep them in the logs
+            app.logger.exception('Health check database ping failed')
+            database['status'] = 'error'
+            return jsonify({'status': 'unhealthy', 'database': database}), 503
+
+        return jsonify({'status': 'healthy', 'database': database}), 200
+
+    # Prometheus scrape endpoint behind a bearer token; open without one
+    # only in development and testing
+    @app.route('/metrics')
+    def metrics_endpoint():
+        token = app.config.get('METRICS_TOKEN')
+        if not token and not (app.debug or app.testing):
+            return jsonify({'error': 'Not found'}), 404
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return jsonify({'error': 'Unauthorized'}), 401
+
+        body, content_type = metrics.render()
+        return body, 200, {'Content-Type': content_type}
 
     # Error handlers
     @app.errorhandler(404)
@@ -87,6 +139,17 @@ def create_app(config_name='development'):
             'message': 'Please provide a valid token'
         }), 401
 
+    @jwt.token_in_blocklist_loader
+    def check_token_version(jwt_header, jwt_payload):
+        return auth_utils.is_token_revoked(jwt_payload)
+
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return jsonify({
+            'error': 'Token has been revoked',
+            'message': 'Please login again'
+        }), 401
+
     @jwt.unauthorized_loader
     def missing_token_callback(error):
         return jsonify({
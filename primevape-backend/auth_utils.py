@@ -0,0 +1,91 @@
+"""
+JWT helpers shared by the blueprints
+
+Tokens carry the user's admin flag and a token version as additional claims,
+so admin_required can authorize from the token alone. Demoting or deleting a
+user bumps their token_version; tokens with an older version are rejected by
+the blocklist check in app.py. Each worker caches the current versions for
+TOKEN_VERSION_CACHE_TTL seconds, which bounds how long a revoked token keeps
+working and keeps the lookup off the hot path. A revocation only reaches that
+cache once its session commits.
+"""
+
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token,
+    jwt_required, get_jwt
+)
+from sqlalchemy import event
+from cache import TTLCache
+from models import db, User
+
+token_versions = TTLCache(ttl=30, max_size=10000)
+
+
+def init_app(app):
+    """Configure the token version cache from the app config"""
+    token_versions.ttl = app.config.get('TOKEN_VERSION_CACHE_TTL', token_versions.ttl)
+    token_versions.clear()
+
+
+def token_claims(user):
+    """Additional JWT claims for user"""
+    return {
+        'is_admin': bool(user.is_admin),
+        'ver': user.token_version or 0
+    }
+
+
+def create_tokens(user):
+    """Create an access/refresh token pair for user"""
+    claims = token_claims(user)
+    access_token = create_access_token(identity=str(user.id), additional_claims=claims)
+    refresh_token = create_refresh_token(identity=str(user.id), additional_claims=claims)
+    return access_token, refresh_token
+
+
+def is_token_revoked(jwt_payload):
+    """Check a decoded token's version against the user's current version"""
+    if 'ver' not in jwt_payload:
+        # Tokens issued before claims were added carry no admin rights
+        return False
+
+    user_id = int(jwt_payload['sub'])
+    current_version = token_versions.get(user_id)
+    if current_version is None:
+        current_version = db.session.query(User.token_version)\
+            .filter_by(id=user_id).scalar()
+        if current_version is None:
+            return True
+        token_versions.set(user_id, current_version)
+
+    return jwt_payload['ver'] != current_version
+
+
+def revoke_tokens(user):
+    """Invalidate every token issued to user when the session commits"""
+    user.token_version = (user.token_version or 0) + 1
+    db.session.info.setdefault('revoked_token_versions', {})[user.id] = user.token_version
+
+
+@event.listens_for(db.session, 'after_commit')
+def _cache_revoked_versions(session):
+    for user_id, version in session.info.pop('revoked_token_versions', {}).items():
+        token_versions.set(user_id, version)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_revoked_versions(session):
+    session.info.pop('revoked_token_versions', None)
+
+
+def admin_required(fn):
+    """Decorator to require admin access"""
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if not get_jwt().get('is_admin'):
+            return jsonify({'error': 'Admin access required'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,353 @@
+"""
+Endpoint benchmarks with regression gates
+
+Boots create_app('testing') against a seeded synthetic database (see
+seed.py --synthetic) and drives the hot endpoints of every blueprint, first
+in-process through the Flask test client and then over HTTP against a real
+threaded WSGI server. For each endpoint it records p50/p95/p99 latency,
+throughput and SQL queries per request.
+
+Results can be stored as a baseline and later runs compared against it. A
+run fails (exit code 1) when an endpoint issues more queries than the
+baseline, gets slower at p95 by more than --tolerance, or returns errors.
+The catalog cache is disabled (CATALOG_CACHE_SIZE=0) so product listings
+and search run their queries on every request and regressions in them fail
+the gate. Query counts are portable between machines; latency baselines are only
+meaningful on the machine that recorded them, so use --queries-only against
+the committed benchmark_baseline.json and --save-baseline for a local one.
+
+Usage:
+    python benchmark.py [--requests N] [--concurrency N] [--mode client|server|both]
+                        [--baseline PATH] [--save-baseline] [--compare]
+                        [--tolerance 0.25] [--queries-only] [--reseed]
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+# The benchmark gets its own database unless one is given
+os.environ.setdefault('TEST_DATABASE_URL', 'sqlite:///benchmark.db')
+# Measure the product queries themselves; with the catalog cache on, every
+# listing after warmup would be a cache hit issuing no SQL at all
+os.environ.setdefault('CATALOG_CACHE_SIZE', '0')
+
+import requests
+from sqlalchemy import event, update
+from werkzeug.serving import make_server
+from app import create_app
+from models import db, User, Product, Order
+from seed import seed_database, generate_dataset
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+DATASET = {
+    'users': 500,
+    'products': 2000,
+    'orders': 20000,
+    'seed': 42,
+    'until': '2026-01-01'
+}
+
+ADMIN = {'email': 'admin@primevape.com', 'password': 'admin123'}
+CUSTOMER = {'email': 'test@example.com', 'password': 'password123'}
+
+
+def order_body(product_id):
+    return {
+        'items': [{'product_id': product_id, 'quantity': 1}],
+        'shipping_address': {
+            'street': '1 Bench St.', 'city': 'Manila', 'state': 'Metro Manila',
+            'zip': '1000', 'country': 'Philippines'
+        }
+    }
+
+
+def scenarios(context):
+    """(name, method, path, auth, body) for every benchmarked endpoint"""
+    until = date.fromisoformat(DATASET['until'])
+    week_ago = (until - timedelta(days=6)).isoformat()
+    quarter_ago = (until - timedelta(days=89)).isoformat()
+
+    return [
+        ('products.list', 'GET', '/api/products', None, None),
+        ('products.list_page_20', 'GET', '/api/products?page=20', None, None),
+        ('products.category', 'GET', '/api/products?category=Liquids', None, None),
+        ('products.featured', 'GET', '/api/products?featured=true', None, None),
+        ('products.cursor', 'GET', '/api/products?cursor=', None, None),
+        ('products.search', 'GET', '/api/products?search=mango', None, None),
+        ('products.detail', 'GET', f"/api/products/{context['product_id']}", None, None),
+        ('products.categories', 'GET', '/api/products/categories', None, None),
+        ('products.batch', 'GET', '/api/products/batch?ids=' + ','.join(map(str, range(1, 21))), None, None),
+        ('auth.login', 'POST', '/api/auth/login', None, CUSTOMER),
+        ('auth.me', 'GET', '/api/auth/me', 'customer', None),
+        ('orders.list', 'GET', '/api/orders', 'customer', None),
+        ('orders.detail', 'GET', f"/api/orders/{context['order_id']}", 'customer', None),
+        ('orders.create', 'POST', '/api/orders', 'customer', order_body(context['product_id'])),
+        ('admin.orders', 'GET', '/api/admin/orders', 'admin', None),
+        ('admin.orders_pending', 'GET', '/api/admin/orders?status=pending', 'admin', None),
+        ('admin.order_detail', 'GET', f"/api/admin/orders/{context['order_id']}", 'admin', None),
+        ('admin.users', 'GET', '/api/admin/users', 'admin', None),
+        ('admin.stats', 'GET', '/api/admin/stats', 'admin', None),
+        ('admin.analytics', 'GET', f'/api/admin/analytics?interval=week&start={quarter_ago}&end={DATASET["until"]}', 'admin', None),
+        ('admin.export_orders', 'GET', f'/api/admin/export/orders?format=csv&start={week_ago}&end={DATASET["until"]}', 'admin', None),
+    ]
+
+
+class QueryCounter:
+    """Counts SQL statements sent through the engine"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self._lock:
+            self.count += 1
+
+
+def prepare_database(reseed=False):
+    """Seed the benchmark database unless it already holds the dataset"""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        ready = (
+            Product.query.count() >= DATASET['products']
+            and User.query.count() >= DATASET['users']
+            and Order.query.count() >= DATASET['orders']
+        )
+
+    if reseed or not ready:
+        print("🌱 Seeding benchmark database...")
+        seed_database('testing')
+        generate_dataset(
+            DATASET['users'], DATASET['products'], DATASET['orders'],
+            seed=DATASET['seed'], until=date.fromisoformat(DATASET['until']),
+            config_name='testing'
+        )
+        print()
+
+
+def setup_context(app, client):
+    """Tokens and ids the scenarios need"""
+    with app.app_context():
+        product = Product.query.filter_by(is_active=True).order_by(Product.id).first()
+        # Plenty of stock so orders.create never runs out
+        db.session.execute(update(Product).where(Product.id == product.id).values(stock=10 ** 9))
+        db.session.commit()
+        product_id = product.id
+
+    tokens = {}
+    for role, credentials in (('admin', ADMIN), ('customer', CUSTOMER)):
+        response = client.post('/api/auth/login', json=credentials)
+        tokens[role] = response.get_json()['access_token']
+
+    context = {'product_id': product_id, 'order_id': None}
+    response = client.post(
+        '/api/orders', json=order_body(product_id),
+        headers={'Authorization': f"Bearer {tokens['customer']}"}
+    )
+    context['order_id'] = response.get_json()['order']['id']
+    return tokens, context
+
+
+def summarize(latencies, errors, queries, elapsed):
+    latencies = sorted(latencies)
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(cuts[49] * 1000, 3),
+        'p95_ms': round(cuts[94] * 1000, 3),
+        'p99_ms': round(cuts[98] * 1000, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'queries_per_request': round(queries / len(latencies), 2) if latencies else 0.0
+    }
+
+
+def run_client(app, counter, tokens, context, count, warmup):
+    """Drive each scenario sequentially through the Flask test client"""
+    client = app.test_client()
+    results = {}
+    for name, method, path, auth, body in scenarios(context):
+        headers = {'Authorization': f'Bearer {tokens[auth]}'} if auth else {}
+
+        def call():
+            response = client.open(path, method=method, json=body, headers=headers)
+            response.get_data()
+            return response.status_code
+
+        for _ in range(warmup):
+            call()
+
+        latencies = []
+        errors = 0
+        queries_before = counter.count
+        started = time.perf_counter()
+        for _ in range(count):
+            t0 = time.perf_counter()
+            if call() >= 400:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+
+        results[name] = summarize(latencies, errors, counter.count - queries_before, elapsed)
+        print_row(name, results[name])
+    return results
+
+
+def run_server(app, counter, tokens, context, count, warmup, concurrency):
+    """Drive each scenario over HTTP against a threaded WSGI server"""
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for name, method, path, auth, body in scenarios(context):
+                headers = {'Authorization': f'Bearer {tokens[auth]}'} if auth else {}
+
+                def call(_):
+                    t0 = time.perf_counter()
+                    response = session().request(method, base + path, json=body, headers=headers)
+                    return time.perf_counter() - t0, response.status_code
+
+                list(pool.map(call, range(warmup)))
+
+                queries_before = counter.count
+                started = time.perf_counter()
+                timings = list(pool.map(call, range(count)))
+                elapsed = time.perf_counter() - started
+
+                results[name] = summarize(
+                    [latency for latency, _ in timings],
+                    sum(1 for _, status in timings if status >= 400),
+                    counter.count - queries_before, elapsed
+                )
+                print_row(name, results[name])
+    finally:
+        server.shutdown()
+    return results
+
+
+def print_row(name, result, note=''):
+    print(f"  {name:<24} p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+          f"p99 {result['p99_ms']:>8.2f}ms  {result['throughput_rps']:>8.1f} req/s  "
+          f"{result['queries_per_request']:>6.2f} q/req{note}")
+
+
+def compare(results, baseline, tolerance, queries_only=False):
+    """Return a list of regression messages (empty when the run passes)"""
+    regressions = []
+    if baseline.get('dataset') != DATASET:
+        print("⚠️  Baseline was recorded on a different dataset; comparing anyway")
+
+    for mode, scenarios_results in results.items():
+        for name, current in scenarios_results.items():
+            if current['errors']:
+                regressions.append(f"{mode}/{name}: {current['errors']} error responses")
+
+            previous = baseline.get('results', {}).get(mode, {}).get(name)
+            if previous is None:
+                continue
+
+            # Query counts are deterministic; allow rounding noise only
+            if current['queries_per_request'] > previous['queries_per_request'] + 0.5:
+                regressions.append(
+                    f"{mode}/{name}: {current['queries_per_request']} queries/request "
+                    f"(baseline {previous['queries_per_request']})"
+                )
+
+            if queries_only:
+                continue
+
+            # Ignore sub-millisecond jitter on very fast endpoints
+            limit = previous['p95_ms'] * (1 + tolerance)
+            if current['p95_ms'] > limit and current['p95_ms'] - previous['p95_ms'] > 1.0:
+                regressions.append(
+                    f"{mode}/{name}: p95 {current['p95_ms']}ms "
+                    f"(baseline {previous['p95_ms']}ms, limit {limit:.2f}ms)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PrimeVape API endpoints')
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=10, help='untimed requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads in server mode')
+    parser.add_argument('--mode', choices=('client', 'server', 'both'), default='both')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--compare', action='store_true', help='fail on regressions against the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 slowdown (0.25 = 25%%)')
+    parser.add_argument('--queries-only', action='store_true',
+                        help='gate on query counts and errors only, e.g. on other hardware')
+    parser.add_argument('--reseed', action='store_true', help='rebuild the benchmark database')
+    args = parser.parse_args()
+
+    prepare_database(args.reseed)
+
+    app = create_app('testing')
+    counter = QueryCounter()
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', counter)
+
+    tokens, context = setup_context(app, app.test_client())
+    results = {}
+
+    if args.mode in ('client', 'both'):
+        print(f"🧪 Test client: {args.requests} requests per endpoint")
+        results['client'] = run_client(app, counter, tokens, context, args.requests, args.warmup)
+        print()
+
+    if args.mode in ('server', 'both'):
+        print(f"🌐 WSGI server: {args.requests} requests per endpoint, {args.concurrency} concurrent")
+        results['server'] = run_server(
+            app, counter, tokens, context, args.requests, args.warmup, args.concurrency
+        )
+        print()
+
+    run = {'dataset': DATASET, 'requests': args.requests, 'concurrency': args.concurrency, 'results': results}
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"❌ No baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.queries_only)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for message in regressions:
+                print(f"   • {message}")
+            return 1
+        print("✅ No regressions against baseline")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"💾 Baseline saved to {args.baseline}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+In-process caches for hot read paths
+
+The catalog cache keeps encoded GET /api/products bodies in memory, along
+with their compressed variants, so repeat storefront hits skip the filtered
+query, its COUNT, JSON encoding and compression. Entries expire after a TTL
+and the least recently used entry is evicted once the cache is full. The
+same cache holds the categories body and the catalog validators behind
+ETags (see conditional.py). Product writes call invalidate() so the worker
+that made the change serves fresh data immediately; other gunicorn workers
+pick it up once their entries expire.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed TTL"""
+
+    def __init__(self, ttl=60, max_size=256):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing/expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entry"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._set(key, value)
+
+    def _set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CatalogCache(TTLCache):
+    """Cache for product listing payloads with a write-through version counter"""
+
+    def __init__(self, ttl=60, max_size=256):
+        super().__init__(ttl=ttl, max_size=max_size)
+        self.version = 0
+
+    def init_app(self, app):
+        """Configure TTL and size from the app config"""
+        self.ttl = app.config.get('CATALOG_CACHE_TTL', self.ttl)
+        self.max_size = app.config.get('CATALOG_CACHE_SIZE', self.max_size)
+        self.invalidate()
+
+    @staticmethod
+    def make_key(category, featured, search, page, per_page, cursor=None, include_total=False,
+                 fields=None):
+        """Build the cache key for a product listing request"""
+        return (
+            category or None, bool(featured), search or None, page, per_page,
+            cursor, bool(include_total), tuple(sorted(set(fields))) if fields is not None else None
+        )
+
+    def store(self, key, value, version):
+        """Store value only if no write happened since version was read"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            if version == self.version:
+                self._set(key, value)
+
+    def invalidate(self):
+        """Drop all cached listings after a product write"""
+        with self._lock:
+            self._data.clear()
+            self.version += 1
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,123 @@
+"""
+Response compression
+
+Responses whose mimetype is in COMPRESS_MIMETYPES and whose body is at least
+COMPRESS_MIN_SIZE bytes are compressed with brotli (when the brotli package
+is installed) or gzip, whichever the client's Accept-Encoding prefers.
+Streamed responses, partial content and bodies that already carry a
+Content-Encoding are left alone.
+
+Cached payloads are kept as CompressedBody objects. Each one compresses
+itself at most once per encoding, so a hot catalog page is compressed once
+and then served as stored bytes until the cache entry is replaced.
+
+A strong ETag on a compressed response gets the encoding appended
+("abc" becomes "abc-br"); conditional.py accepts either form.
+"""
+
+import gzip
+import threading
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional, gzip still works
+    brotli = None
+
+
+class CompressedBody:
+    """Encoded response body plus its compressed variants"""
+
+    def __init__(self, body, mimetype='application/json'):
+        self.body = body
+        self.mimetype = mimetype
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_response(cls, response):
+        """Capture the body of a fully built (non-streamed) response"""
+        return cls(response.get_data(), response.mimetype)
+
+    def encoded(self, encoding, compress):
+        """Body compressed with encoding, computed on first use"""
+        with self._lock:
+            if encoding not in self._encoded:
+                self._encoded[encoding] = compress(self.body)
+            return self._encoded[encoding]
+
+
+class Compression:
+    """Flask extension compressing eligible responses"""
+
+    def __init__(self):
+        self.enabled = True
+        self.min_size = 1024
+        self.mimetypes = frozenset()
+        self.gzip_level = 6
+        self.brotli_quality = 4
+
+    def init_app(self, app):
+        """Read settings and register the after-request hook"""
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.mimetypes = frozenset(app.config.get('COMPRESS_MIMETYPES', ()))
+        self.gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', self.gzip_level)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', self.brotli_quality)
+
+        if self.enabled:
+            app.after_request(self._compress_response)
+
+    @property
+    def encodings(self):
+        """Supported encodings, in order of preference"""
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def compressor(self, encoding):
+        """Function compressing bytes with encoding"""
+        if encoding == 'br':
+            return lambda data: brotli.compress(data, quality=self.brotli_quality)
+        return lambda data: gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def response(self, body):
+        """Build a response for a CompressedBody, reusing its compressed bytes"""
+        response = current_app.response_class(body.body, mimetype=body.mimetype)
+        response.compressed_body = body
+        return response
+
+    def _compress_response(self, response):
+        if (
+            response.mimetype not in self.mimetypes
+            or response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if len(response.get_data()) < self.min_size:
+            return response
+
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+
+        body = getattr(response, 'compressed_body', None)
+        if body is not None:
+            data = body.encoded(encoding, self.compressor(encoding))
+        else:
+            data = self.compressor(encoding)(response.get_data())
+
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+
+        # A strong ETag names exact bytes, so each encoding gets its own
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f'{etag}-{encoding}')
+        return response
+
+
+compression = Compression()
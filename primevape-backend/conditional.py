@@ -0,0 +1,107 @@
+"""
+HTTP conditional requests for the catalog endpoints
+
+Catalog responses carry a strong ETag, a Last-Modified date and a
+Cache-Control header. Both validators come from a catalog token, the newest
+Product.updated_at plus the product count, which one small aggregate query
+reads. The token is kept in the catalog cache, so writes through the API
+drop it with everything else and a warm worker answers If-None-Match or
+If-Modified-Since with 304 Not Modified without touching the database.
+
+ETags name a representation: the token plus whatever selects the body
+(listing parameters, product id). Categories have no timestamp, so their
+tag is a hash of the body, cached alongside it. When a body is compressed
+the encoding is appended to the tag ("...-br"), and matching ignores that
+suffix.
+"""
+
+import hashlib
+from datetime import timezone
+from flask import current_app, request
+from sqlalchemy import func, select
+from cache import catalog_cache
+from models import db, Product
+
+VALIDATORS_KEY = ('validators',)
+ENCODING_SUFFIXES = ('', '-br', '-gzip')
+
+
+class Validators:
+    """Catalog token and the Last-Modified date it implies"""
+
+    def __init__(self, token, last_modified):
+        self.token = token
+        self.last_modified = last_modified
+
+    def etag(self, *parts):
+        """Strong ETag for the representation selected by parts"""
+        raw = repr((self.token, parts)).encode('utf-8')
+        return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def content_etag(data):
+    """Strong ETag for a body with no catalog token (e.g. categories)"""
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def catalog_validators():
+    """Current catalog Validators, read once per cache TTL"""
+    validators = catalog_cache.get(VALIDATORS_KEY)
+    if validators is not None:
+        return validators
+
+    version = catalog_cache.version
+    updated_at, count = db.session.execute(
+        select(func.max(Product.updated_at), func.count(Product.id))
+    ).one()
+    last_modified = updated_at.replace(tzinfo=timezone.utc, microsecond=0) if updated_at else None
+    validators = Validators(f'{updated_at.isoformat() if updated_at else ""}:{count}', last_modified)
+    catalog_cache.store(VALIDATORS_KEY, validators, version)
+    return validators
+
+
+def matching_etag(etag):
+    """The tag from If-None-Match that matches etag, in any encoding"""
+    for suffix in ENCODING_SUFFIXES:
+        if request.if_none_match.contains_weak(etag + suffix):
+            return etag + suffix
+    return None
+
+
+def not_modified(etag, last_modified=None):
+    """A 304 response if the client's copy is current, else None
+
+    If-None-Match wins over If-Modified-Since when both are sent.
+    """
+    if request.if_none_match:
+        matched = matching_etag(etag)
+        if matched is None:
+            return None
+        response = current_app.response_class(status=304)
+        response.set_etag(etag if request.if_none_match.star_tag else matched)
+    elif request.if_modified_since and last_modified:
+        if last_modified > request.if_modified_since:
+            return None
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+    else:
+        return None
+
+    return add_validators(response, None, last_modified)
+
+
+def add_validators(response, etag, last_modified=None):
+    """Set ETag (unless already set), Last-Modified and Cache-Control"""
+    if etag is not None:
+        response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+
+    max_age = current_app.config.get('CATALOG_MAX_AGE', 0)
+    response.cache_control.public = True
+    if max_age > 0:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    response.vary.add('Accept-Encoding')
+    return response
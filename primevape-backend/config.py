@@ -4,17 +4,114 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def env_bool(name, default):
+    """Read a true/false environment variable"""
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+def database_url(url):
+    """Pin Postgres URLs to psycopg2, the driver in requirements.txt
+
+    Neon and Heroku-style hosts hand out postgres:// or postgresql:// URLs,
+    which newer SQLAlchemy releases map to psycopg 3.
+    """
+    for prefix in ('postgres://', 'postgresql://'):
+        if url.startswith(prefix):
+            return 'postgresql+psycopg2://' + url[len(prefix):]
+    return url
+
+
+def engine_options(url):
+    """SQLAlchemy engine options for url, driven by the DB_* environment variables
+
+    Connections are pinged before use and recycled before Neon's idle
+    timeout closes them, so workers don't fail on the first query after a
+    quiet period. DB_PGBOUNCER=true is for PgBouncer-style transaction
+    poolers such as Neon's -pooler endpoint: they reject startup options, so
+    the statement timeout must then be set on the role instead
+    (ALTER ROLE ... SET statement_timeout), and psycopg 3 prepared
+    statements are disabled.
+    """
+    options = {
+        'pool_pre_ping': env_bool('DB_POOL_PRE_PING', True),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 240)),  # seconds
+    }
+    if not url.startswith('postgresql'):
+        return options
+
+    options.update({
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 5)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),  # seconds to wait for a free connection
+    })
+
+    connect_args = {
+        'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 10)),
+        # Keep idle connections alive through NATs and proxies
+        'keepalives': 1,
+        'keepalives_idle': 30,
+        'keepalives_interval': 10,
+        'keepalives_count': 3,
+    }
+    statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+    if env_bool('DB_PGBOUNCER', False):
+        if url.startswith('postgresql+psycopg:'):
+            connect_args['prepare_threshold'] = None
+    elif statement_timeout:
+        connect_args['options'] = f'-c statement_timeout={statement_timeout}'
+
+    options['connect_args'] = connect_args
+    return options
+
+
 class Config:
     """Base configuration"""
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-jwt-secret-key')
-    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///primevape.db')
+    SQLALCHEMY_DATABASE_URI = database_url(os.getenv('DATABASE_URL', 'sqlite:///primevape.db'))
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     JWT_COOKIE_CSRF_PROTECT = False  # Disable CSRF for API endpoints
+    TOKEN_VERSION_CACHE_TTL = int(os.getenv('TOKEN_VERSION_CACHE_TTL', 30))  # seconds a revoked token may linger
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173').split(',')
 
+    # Password hashing (bcrypt cost and the worker pool that runs it)
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    BCRYPT_POOL_SIZE = int(os.getenv('BCRYPT_POOL_SIZE', 4))  # worker threads
+    BCRYPT_QUEUE_LIMIT = int(os.getenv('BCRYPT_QUEUE_LIMIT', 16))  # waiting hashes before 503
+
+    # In-process cache for GET /api/products listings
+    CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', 60))  # seconds
+    CATALOG_CACHE_SIZE = int(os.getenv('CATALOG_CACHE_SIZE', 256))  # entries
+    CATALOG_MAX_AGE = int(os.getenv('CATALOG_MAX_AGE', 30))  # Cache-Control max-age for catalog responses (0 = always revalidate)
+    SEARCH_INDEX_TTL = int(os.getenv('SEARCH_INDEX_TTL', 300))  # seconds before the SQLite search index rebuilds
+
+    # Response compression (brotli when installed, else gzip)
+    COMPRESS_ENABLED = env_bool('COMPRESS_ENABLED', True)
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # bytes
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+    COMPRESS_MIMETYPES = [
+        'application/json', 'application/x-ndjson', 'text/csv',
+        'text/plain', 'text/html', 'text/css', 'application/javascript'
+    ]
+
+    # Seconds an Idempotency-Key on POST /api/orders is remembered
+    IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 86400))
+
+    # JSON encoder for responses: auto (orjson when installed), orjson or stdlib
+    JSON_ENGINE = os.getenv('JSON_ENGINE', 'auto')
+
+    # Per-request SQL counts and timings (Server-Timing header and primevape.sql log)
+    SQL_INSTRUMENTATION = env_bool('SQL_INSTRUMENTATION', True)
+    SQL_REPEAT_THRESHOLD = int(os.getenv('SQL_REPEAT_THRESHOLD', 5))  # same statement this often is logged as N+1
+    SQL_QUERY_BUDGET = None  # statements per request; enforced only when TESTING
+
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # Bearer token for /metrics; unset = 404 outside development/testing
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
@@ -28,7 +125,10 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///test_primevape.db'
+    SQLALCHEMY_DATABASE_URI = database_url(os.getenv('TEST_DATABASE_URL', 'sqlite:///test_primevape.db'))
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    BCRYPT_LOG_ROUNDS = 4  # Fast hashing for tests
+    SQL_QUERY_BUDGET = int(os.getenv('SQL_QUERY_BUDGET', 30))  # Fail requests that issue more statements
 
 config = {
     'development': DevelopmentConfig,
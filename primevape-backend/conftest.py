@@ -0,0 +1,87 @@
+"""
+Shared pytest fixtures
+
+Tests run against the testing config, which uses TEST_DATABASE_URL
+(SQLite by default). Point it at a Postgres database to run the same suite
+there, e.g.
+
+    TEST_DATABASE_URL=postgresql://localhost/primevape_test python -m pytest -q
+
+Every test starts from empty tables.
+"""
+
+import re
+import pytest
+from app import create_app
+from cache import catalog_cache
+from models import db, User, Product
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+    catalog_cache.invalidate()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def add_user(app, email, password='password123', is_admin=False):
+    """Create a user and return its id"""
+    with app.app_context():
+        user = User(email=email, username=email.split('@')[0], is_admin=is_admin)
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def add_products(app, count, stock=50, **fields):
+    """Create count active products and return their ids"""
+    with app.app_context():
+        products = [
+            Product(
+                name=f'Product {i}', category='Pods' if i % 2 else 'Liquids',
+                price=10.0 + i, description=f'Product {i} description',
+                stock=stock, **fields
+            )
+            for i in range(count)
+        ]
+        db.session.add_all(products)
+        db.session.commit()
+        return [product.id for product in products]
+
+
+def query_count(response):
+    """Statements the request issued, from its Server-Timing header"""
+    match = re.search(r'"(\d+) queries"', response.headers['Server-Timing'])
+    return int(match.group(1))
+
+
+def auth_header(client, email, password='password123'):
+    """Authorization header for a logged-in user"""
+    response = client.post('/api/auth/login', json={'email': email, 'password': password})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+@pytest.fixture
+def customer(app, client):
+    """(user id, auth header) for a customer account"""
+    user_id = add_user(app, 'customer@example.com')
+    return user_id, auth_header(client, 'customer@example.com')
+
+
+@pytest.fixture
+def admin(app, client):
+    """(user id, auth header) for an admin account"""
+    user_id = add_user(app, 'admin@example.com', is_admin=True)
+    return user_id, auth_header(client, 'admin@example.com')
@@ -0,0 +1,141 @@
+"""
+Streaming CSV/NDJSON exports for the admin API
+
+Rows are read as plain column tuples with yield_per, which uses a
+server-side cursor on Postgres, and are written out as they arrive. Memory
+therefore stays flat whether an export has a thousand rows or ten million.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from models import db, User, Order, OrderItem, Product
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+BATCH_SIZE = 1000
+
+ORDER_COLUMNS = [
+    ('id', Order.id),
+    ('order_number', Order.order_number),
+    ('user_id', Order.user_id),
+    ('status', Order.status),
+    ('subtotal', Order.subtotal),
+    ('shipping_cost', Order.shipping_cost),
+    ('total', Order.total),
+    ('shipping_street', Order.shipping_street),
+    ('shipping_city', Order.shipping_city),
+    ('shipping_state', Order.shipping_state),
+    ('shipping_zip', Order.shipping_zip),
+    ('shipping_country', Order.shipping_country),
+    ('created_at', Order.created_at),
+    ('updated_at', Order.updated_at),
+]
+
+ORDER_ITEM_COLUMNS = [
+    ('id', OrderItem.id),
+    ('order_id', OrderItem.order_id),
+    ('order_number', Order.order_number),
+    ('order_status', Order.status),
+    ('order_created_at', Order.created_at),
+    ('product_id', OrderItem.product_id),
+    ('product_name', Product.name),
+    ('quantity', OrderItem.quantity),
+    ('price', OrderItem.price),
+]
+
+USER_COLUMNS = [
+    ('id', User.id),
+    ('email', User.email),
+    ('username', User.username),
+    ('first_name', User.first_name),
+    ('last_name', User.last_name),
+    ('phone', User.phone),
+    ('is_admin', User.is_admin),
+    ('created_at', User.created_at),
+]
+
+
+def _date_filters(column, start, end):
+    filters = []
+    if start:
+        filters.append(column >= datetime.combine(start, time.min))
+    if end:
+        filters.append(column < datetime.combine(end + timedelta(days=1), time.min))
+    return filters
+
+
+def orders_query(start=None, end=None, status=None):
+    """Column query for the orders export"""
+    query = db.session.query(*[column for _, column in ORDER_COLUMNS])\
+        .filter(*_date_filters(Order.created_at, start, end))
+    if status:
+        query = query.filter(Order.status == status)
+    return query.order_by(Order.id)
+
+
+def order_items_query(start=None, end=None, status=None):
+    """Column query for the order items export, filtered on the parent order"""
+    query = db.session.query(*[column for _, column in ORDER_ITEM_COLUMNS])\
+        .join(Order, Order.id == OrderItem.order_id)\
+        .outerjoin(Product, Product.id == OrderItem.product_id)\
+        .filter(*_date_filters(Order.created_at, start, end))
+    if status:
+        query = query.filter(Order.status == status)
+    return query.order_by(OrderItem.id)
+
+
+def users_query(start=None, end=None, status=None):
+    """Column query for the users export (status is ignored)"""
+    return db.session.query(*[column for _, column in USER_COLUMNS])\
+        .filter(*_date_filters(User.created_at, start, end))\
+        .order_by(User.id)
+
+
+EXPORTS = {
+    'orders': (ORDER_COLUMNS, orders_query),
+    'order-items': (ORDER_ITEM_COLUMNS, order_items_query),
+    'users': (USER_COLUMNS, users_query),
+}
+
+
+def parse_dates(args):
+    """Optional start/end (YYYY-MM-DD) from request args"""
+    start = date.fromisoformat(args['start']) if args.get('start') else None
+    end = date.fromisoformat(args['end']) if args.get('end') else None
+    return start, end
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def stream_export(name, fmt, start=None, end=None, status=None):
+    """Yield the export as CSV or NDJSON text chunks"""
+    columns, build_query = EXPORTS[name]
+    names = [label for label, _ in columns]
+    rows = build_query(start, end, status).execution_options(yield_per=BATCH_SIZE)
+
+    buffer = io.StringIO()
+    if fmt == 'ndjson':
+        def write(row):
+            buffer.write(json.dumps(dict(zip(names, row))) + '\n')
+    else:
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        write = writer.writerow
+
+    for count, row in enumerate(rows, 1):
+        write([_plain(value) for value in row])
+        # Flush in batches rather than per row
+        if count % BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
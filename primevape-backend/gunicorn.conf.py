@@ -0,0 +1,34 @@
+"""
+Gunicorn settings, picked up automatically from the working directory
+
+Workers are threaded (gthread), so a request waiting on the bcrypt pool in
+hashing.py only holds one of a worker's threads; the others keep serving the
+catalog, and once BCRYPT_QUEUE_LIMIT hashes are pending logins get a 503.
+Keep GUNICORN_THREADS at or below DB_POOL_SIZE + DB_MAX_OVERFLOW so every
+thread can get a database connection.
+
+Workers share Prometheus metrics through files in PROMETHEUS_MULTIPROC_DIR.
+The directory is emptied when the server starts, and a worker's live gauges
+are dropped when it exits.
+"""
+
+import os
+import shutil
+import tempfile
+
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+multiproc_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'primevape-metrics')
+)
+
+
+def on_starting(server):
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
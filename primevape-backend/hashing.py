@@ -0,0 +1,101 @@
+"""
+Bounded worker pool for bcrypt password hashing
+
+bcrypt is deliberately slow, so hashing runs on a small dedicated thread
+pool instead of inline on whichever request thread asked for it. The number
+of hashes running or waiting is capped at BCRYPT_POOL_SIZE +
+BCRYPT_QUEUE_LIMIT; past that, callers get HashingPoolSaturated and the
+route answers 503 instead of piling up login attempts.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when every hashing worker and queue slot is taken"""
+
+
+class PasswordHasher:
+    """Runs Flask-Bcrypt hashing and checks on a bounded thread pool"""
+
+    def __init__(self, bcrypt):
+        self.bcrypt = bcrypt
+        self.rounds = 12
+        self._executor = None
+        self._capacity = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.on_pending_change = None  # Called with the new pending count
+
+    def init_app(self, app):
+        """Create the pool sized from the app config"""
+        pool_size = app.config.get('BCRYPT_POOL_SIZE', 4)
+        queue_limit = app.config.get('BCRYPT_QUEUE_LIMIT', 16)
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', self.rounds)
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix='bcrypt'
+        )
+        self._capacity = pool_size + queue_limit
+
+    @property
+    def pending(self):
+        """Number of hashes currently running or queued"""
+        return self._pending
+
+    @property
+    def capacity(self):
+        """Hashes that may run or wait before callers are turned away"""
+        return self._capacity
+
+    def _changed(self, pending):
+        if self.on_pending_change is not None:
+            self.on_pending_change(pending)
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+            pending = self._pending
+        self._changed(pending)
+
+    def _run(self, fn, *args):
+        # Scripts that never called init_app hash inline
+        if self._executor is None:
+            return fn(*args)
+
+        with self._lock:
+            if self._pending >= self._capacity:
+                raise HashingPoolSaturated('Password hashing pool is saturated')
+            self._pending += 1
+            pending = self._pending
+        self._changed(pending)
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+
+        future.add_done_callback(self._release)
+        return future.result()
+
+    def hash(self, password):
+        """Hash password with the configured cost"""
+        return self._run(self._hash, password)
+
+    def check(self, pw_hash, password):
+        """Check password against pw_hash"""
+        return self._run(self.bcrypt.check_password_hash, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        """True if pw_hash was created with a different cost than configured"""
+        try:
+            return int(pw_hash.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+    def _hash(self, password):
+        return self.bcrypt.generate_password_hash(password, self.rounds).decode('utf-8')
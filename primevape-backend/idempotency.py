@@ -0,0 +1,129 @@
+"""
+Idempotency keys for POST /api/orders
+
+Clients on flaky networks retry checkout. When a request carries an
+Idempotency-Key header, the key is claimed by inserting an idempotency_keys
+row in the same transaction that creates the order, and the response body is
+stored on that row before it commits:
+
+- a retry after the order committed finds the row and gets the stored
+  response back (with Idempotent-Replayed: true) without reading products
+  or touching stock
+- a duplicate sent while the first request is still running blocks on the
+  unique (user_id, key) index until the first one finishes, then replays its
+  response; if the first rolled back, the duplicate goes ahead as a new order
+- reusing a key with a different request body is rejected with 422
+
+Keys are scoped to the user and expire after IDEMPOTENCY_KEY_TTL seconds.
+Only successful orders are recorded, so a request rejected for validation or
+stock can be retried with the same key. Expired rows are deleted at most once
+a minute per worker, in a transaction of their own.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app, request
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from models import db, IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+PURGE_INTERVAL = 60  # seconds
+
+_purge_lock = threading.Lock()
+_next_purge = 0.0
+
+
+class IdempotencyError(ValueError):
+    """Raised when an Idempotency-Key can't be honoured"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _ttl():
+    return timedelta(seconds=current_app.config.get('IDEMPOTENCY_KEY_TTL', 86400))
+
+
+def request_hash(body):
+    """Fingerprint of the method, path and JSON body of the current request"""
+    canonical = json.dumps(body, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{canonical}'.encode('utf-8')).hexdigest()
+
+
+def purge_expired():
+    """Delete keys older than the TTL"""
+    cutoff = datetime.utcnow() - _ttl()
+    with db.engine.begin() as conn:
+        return conn.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)).rowcount
+
+
+def _maybe_purge():
+    global _next_purge
+    with _purge_lock:
+        now = time.monotonic()
+        if now < _next_purge:
+            return
+        _next_purge = now + PURGE_INTERVAL
+    purge_expired()
+
+
+def replay(record):
+    """Response rebuilt from a recorded request"""
+    if record.response_body is None:
+        raise IdempotencyError('A request with this Idempotency-Key is still in progress', 409)
+
+    response = current_app.response_class(
+        record.response_body, status=record.status_code, mimetype='application/json'
+    )
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def claim(user_id, key, body):
+    """Claim key for this request inside the current transaction
+
+    Returns (record, None) when the request should run, in which case the
+    caller passes record to save() before committing, or (None, response)
+    when an earlier request with the same key already succeeded.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyError(f'Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters', 400)
+
+    _maybe_purge()
+    digest = request_hash(body)
+
+    # Two attempts: the second follows removing an expired row for the key
+    for _ in range(2):
+        record = IdempotencyKey(user_id=user_id, key=key, request_hash=digest)
+        db.session.add(record)
+        try:
+            # Waits here while a concurrent request holds the same key
+            db.session.flush()
+            return record, None
+        except IntegrityError:
+            db.session.rollback()
+
+        existing = IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+        if existing is None:
+            continue
+        if existing.created_at < datetime.utcnow() - _ttl():
+            db.session.delete(existing)
+            db.session.commit()
+            continue
+        if existing.request_hash != digest:
+            raise IdempotencyError('Idempotency-Key was already used with a different request', 422)
+        return None, replay(existing)
+
+    raise IdempotencyError('Idempotency-Key is in use, please retry', 409)
+
+
+def save(record, order_id, body, status_code):
+    """Store the response for a claimed key; committed with the order"""
+    record.order_id = order_id
+    record.status_code = status_code
+    record.response_body = current_app.json.dumps(body)
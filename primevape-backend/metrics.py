@@ -0,0 +1,123 @@
+"""
+Prometheus metrics served at /metrics
+
+- primevape_http_request_duration_seconds: latency histogram per method and
+  route (the URL rule, so ids don't create new series)
+- primevape_http_requests_total: responses per method, route and status
+- primevape_db_pool_*: connections checked out, overflow and pool size
+- primevape_bcrypt_pending / _capacity: password hashes running or queued
+- primevape_orders_created_total, primevape_order_revenue_total and
+  primevape_orders_cancelled_total: business counters
+
+Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+(set up by gunicorn.conf.py) and /metrics merges them, so a scrape sees the
+whole server no matter which worker answers it. Gauges are summed over live
+workers. Without that variable, metrics come from the current process only.
+"""
+
+import os
+import time
+from flask import g, request
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from models import db, hasher
+
+REQUEST_LATENCY = Histogram(
+    'primevape_http_request_duration_seconds', 'Request latency',
+    ['method', 'route']
+)
+REQUESTS = Counter(
+    'primevape_http_requests_total', 'Responses by status',
+    ['method', 'route', 'status']
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    'primevape_db_pool_checked_out', 'Database connections in use',
+    multiprocess_mode='livesum'
+)
+DB_POOL_OVERFLOW = Gauge(
+    'primevape_db_pool_overflow', 'Database connections open beyond the pool size',
+    multiprocess_mode='livesum'
+)
+DB_POOL_SIZE = Gauge(
+    'primevape_db_pool_size', 'Configured database pool size',
+    multiprocess_mode='livesum'
+)
+BCRYPT_PENDING = Gauge(
+    'primevape_bcrypt_pending', 'Password hashes running or queued',
+    multiprocess_mode='livesum'
+)
+BCRYPT_CAPACITY = Gauge(
+    'primevape_bcrypt_capacity', 'Password hashes allowed before 503s',
+    multiprocess_mode='livesum'
+)
+ORDERS_CREATED = Counter('primevape_orders_created', 'Orders placed')
+ORDER_REVENUE = Counter('primevape_order_revenue', 'Total value of orders placed')
+ORDERS_CANCELLED = Counter('primevape_orders_cancelled', 'Orders cancelled')
+
+
+class Metrics:
+    """Flask extension recording request, pool and hashing metrics"""
+
+    def init_app(self, app):
+        """Hook request timing, pool events and the hashing pool"""
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'checkout', lambda *args: self._sample_pool(engine.pool))
+        event.listen(engine, 'checkin', lambda *args: self._sample_pool(engine.pool))
+        self._sample_pool(engine.pool)
+
+        hasher.on_pending_change = BCRYPT_PENDING.set
+        BCRYPT_PENDING.set(hasher.pending)
+        BCRYPT_CAPACITY.set(hasher.capacity)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _sample_pool(self, pool):
+        # Only QueuePool tracks overflow; other pools report what they can
+        for gauge, reading in (
+            (DB_POOL_CHECKED_OUT, 'checkedout'),
+            (DB_POOL_OVERFLOW, 'overflow'),
+            (DB_POOL_SIZE, 'size')
+        ):
+            sample = getattr(pool, reading, None)
+            if sample is not None:
+                gauge.set(max(sample(), 0))
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None or request.endpoint == 'metrics_endpoint':
+            return response
+
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.labels(request.method, route).observe(time.perf_counter() - started)
+        REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+        return response
+
+    def record_order(self, order):
+        """Count a newly placed order"""
+        ORDERS_CREATED.inc()
+        ORDER_REVENUE.inc(order.total)
+
+    def record_status_change(self, old_status, new_status):
+        """Count an order moving to cancelled"""
+        if new_status == 'cancelled' and old_status != 'cancelled':
+            ORDERS_CANCELLED.inc()
+
+    def render(self):
+        """Return (body, content type) for a scrape"""
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+metrics = Metrics()
@@ -0,0 +1,90 @@
+"""
+Apply schema changes to an existing PrimeVape database
+
+db.create_all() only creates missing tables, so columns and indexes added to
+models.py after a database was first created never reach it. Each migration
+below checks the live schema before changing anything, so the script is safe
+to run repeatedly against SQLite or Neon.
+
+Usage:
+    python migrations.py
+"""
+
+import os
+from sqlalchemy import inspect, text
+from models import db
+from search import PRODUCT_SEARCH_DDL
+
+
+def add_column(table, column, ddl):
+    """Add a column to table unless it already exists"""
+    columns = {c['name'] for c in inspect(db.engine).get_columns(table)}
+    if column in columns:
+        return False
+
+    with db.engine.begin() as conn:
+        conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+    return True
+
+
+def create_indexes():
+    """Create every index declared in models.py that is missing"""
+    inspector = inspect(db.engine)
+    created = False
+
+    for table in db.metadata.sorted_tables:
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                created = True
+
+    return created
+
+
+def create_search_index():
+    """Create the full-text GIN index used by product search (Postgres only)"""
+    if db.engine.dialect.name != 'postgresql':
+        return False
+
+    existing = {ix['name'] for ix in inspect(db.engine).get_indexes('products')}
+    if 'ix_products_search' in existing:
+        return False
+
+    with db.engine.begin() as conn:
+        conn.execute(text(PRODUCT_SEARCH_DDL))
+    return True
+
+
+MIGRATIONS = [
+    ('users.token_version', lambda: add_column(
+        'users', 'token_version', 'INTEGER NOT NULL DEFAULT 0'
+    )),
+    ('secondary indexes', create_indexes),
+    ('products full-text search index', create_search_index),
+]
+
+
+def run_migrations():
+    """Apply every pending migration to the current database"""
+    db.create_all()
+
+    applied = 0
+    for name, migrate in MIGRATIONS:
+        if migrate():
+            print(f"✅ Applied {name}")
+            applied += 1
+        else:
+            print(f"⏭️  {name} up to date")
+
+    return applied
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        print("🚀 Running migrations...")
+        count = run_migrations()
+        print(f"🎉 Done, {count} migration(s) applied")
@@ -1,9 +1,14 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from hashing import PasswordHasher
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
+hasher = PasswordHasher(bcrypt)
 
 class User(db.Model):
     """User model for authentication and profile management"""
@@ -17,20 +22,29 @@ class User(db.Model):
     last_name = db.Column(db.String(50))
     phone = db.Column(db.String(20))
     is_admin = db.Column(db.Boolean, default=False)
+    token_version = db.Column(db.Integer, nullable=False, default=0)  # Bumped to revoke issued tokens
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
+
     # Relationships
     orders = db.relationship('Order', backref='user', lazy=True, cascade='all, delete-orphan')
     addresses = db.relationship('Address', backref='user', lazy=True, cascade='all, delete-orphan')
 
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = hasher.hash(password)
 
     def check_password(self, password):
         """Check if password matches hash"""
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return hasher.check(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash uses a different bcrypt cost than configured"""
+        return hasher.needs_rehash(self.password_hash)
 
     def to_dict(self, include_sensitive=False):
         """Convert user to dictionary"""
@@ -42,7 +56,7 @@ class User(db.Model):
             'last_name': self.last_name,
             'phone': self.phone,
             'is_admin': self.is_admin,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
         return data
 
@@ -63,6 +77,55 @@ class Product(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Storefront listings filter on is_active plus an optional category or
+    # featured flag, newest first
+    __table_args__ = (
+        db.Index('ix_products_active_created', 'is_active', 'created_at', 'id'),
+        db.Index('ix_products_active_category_created', 'is_active', 'category', 'created_at', 'id'),
+        db.Index('ix_products_active_featured_created', 'is_active', 'featured', 'created_at', 'id'),
+    )
+
+    @classmethod
+    def reserve_stock(cls, product_id, quantity):
+        """Atomically take quantity units, returning False if stock is short
+
+        The check and the decrement happen in one conditional UPDATE, so
+        concurrent checkouts can never drive stock below zero.
+        """
+        result = db.session.execute(
+            update(cls)
+            .where(cls.id == product_id, cls.stock >= quantity)
+            .values(stock=cls.stock - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    @classmethod
+    def release_stock(cls, product_id, quantity):
+        """Atomically return quantity units to stock"""
+        db.session.execute(
+            update(cls)
+            .where(cls.id == product_id)
+            .values(stock=cls.stock + quantity)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def adjust_stock(cls, product_id, delta):
+        """Atomically add delta (possibly negative) to stock
+
+        Returns the new stock level, or None if the product doesn't exist or
+        the adjustment would take stock below zero. Like reserve_stock this
+        is a single relative UPDATE, so it never loses a concurrent checkout.
+        """
+        return db.session.execute(
+            update(cls)
+            .where(cls.id == product_id, cls.stock + delta >= 0)
+            .values(stock=cls.stock + delta)
+            .returning(cls.stock)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+
     def to_dict(self):
         """Convert product to dictionary"""
         return {
@@ -75,7 +138,7 @@ class Product(db.Model):
             'stock': self.stock,
             'featured': self.featured,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 
@@ -84,7 +147,7 @@ class Address(db.Model):
     __tablename__ = 'addresses'
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     street = db.Column(db.String(200), nullable=False)
     city = db.Column(db.String(100), nullable=False)
     state = db.Column(db.String(100), nullable=False)
@@ -129,9 +192,36 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Customer history, admin status filter and the unfiltered admin listing
+    __table_args__ = (
+        db.Index('ix_orders_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_orders_status_created', 'status', 'created_at', 'id'),
+        db.Index('ix_orders_created_at_id', 'created_at', 'id'),
+    )
+
     # Relationships
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
 
+    @classmethod
+    def transition(cls, order_id, from_status, to_status):
+        """Atomically move an order between statuses, False if it changed meanwhile"""
+        result = db.session.execute(
+            update(cls)
+            .where(cls.id == order_id, cls.status == from_status)
+            .values(status=to_status)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    @classmethod
+    def with_items(cls):
+        """Query that loads items and their product names up front"""
+        return cls.query.options(
+            selectinload(cls.items)
+            .joinedload(OrderItem.product)
+            .load_only(Product.name)
+        )
+
     def to_dict(self, include_items=True):
         """Convert order to dictionary"""
         data = {
@@ -149,8 +239,8 @@ class Order(db.Model):
                 'zip_code': self.shipping_zip,
                 'country': self.shipping_country
             },
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
         if include_items:
@@ -164,7 +254,7 @@ class OrderItem(db.Model):
     __tablename__ = 'order_items'
 
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)  # Price at time of order
@@ -185,6 +275,57 @@ class OrderItem(db.Model):
         }
 
 
+class InventoryAdjustment(db.Model):
+    """Ledger row for every stock delta applied through the admin API"""
+    __tablename__ = 'inventory_adjustments'
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, nullable=False)  # Kept after the product is deleted
+    delta = db.Column(db.Integer, nullable=False)
+    stock_after = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(100))
+    reference = db.Column(db.String(100))  # e.g. warehouse sync batch id
+    user_id = db.Column(db.Integer)  # Admin who applied it
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_inventory_adjustments_product_created', 'product_id', 'created_at', 'id'),
+        db.Index('ix_inventory_adjustments_created_at_id', 'created_at', 'id'),
+    )
+
+    def to_dict(self):
+        """Convert ledger row to dictionary"""
+        return {
+            'id': self.id,
+            'product_id': self.product_id,
+            'delta': self.delta,
+            'stock_after': self.stock_after,
+            'reason': self.reason,
+            'reference': self.reference,
+            'user_id': self.user_id,
+            'created_at': self.created_at
+        }
+
+
+class IdempotencyKey(db.Model):
+    """Outcome of a client request sent with an Idempotency-Key header"""
+    __tablename__ = 'idempotency_keys'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)  # sha256 of method, path and body
+    order_id = db.Column(db.Integer)  # Kept after the order is deleted
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.Text)  # Set just after the order commits
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),
+        db.Index('ix_idempotency_keys_created_at', 'created_at'),
+    )
+
+
 class Category(db.Model):
     """Category model for product categories"""
     __tablename__ = 'categories'
@@ -207,3 +348,138 @@ class Category(db.Model):
             'image': self.image,
             'is_active': self.is_active
         }
+
+
+class StoreStats(db.Model):
+    """Single-row summary behind the admin dashboard
+
+    Counters are adjusted in the same transaction as the order/product write
+    that changes them, so reading the dashboard never scans orders.
+    reconcile() rebuilds the row from the source tables.
+    """
+    __tablename__ = 'store_stats'
+
+    id = db.Column(db.Integer, primary_key=True)
+    total_orders = db.Column(db.Integer, nullable=False, default=0)
+    total_products = db.Column(db.Integer, nullable=False, default=0)
+    total_revenue = db.Column(db.Float, nullable=False, default=0.0)  # Excludes cancelled orders
+    pending_orders = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    SINGLETON_ID = 1
+
+    @classmethod
+    def apply(cls, orders=0, products=0, revenue=0.0, pending=0):
+        """Add deltas to the counters inside the current transaction
+
+        If the row doesn't exist yet this is a no-op; the first read
+        rebuilds it from the tables, which already include this write.
+        """
+        db.session.execute(
+            update(cls)
+            .where(cls.id == cls.SINGLETON_ID)
+            .values(
+                total_orders=cls.total_orders + orders,
+                total_products=cls.total_products + products,
+                total_revenue=cls.total_revenue + revenue,
+                pending_orders=cls.pending_orders + pending,
+                updated_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def record_order(cls, order, sign=1):
+        """Count a new order (sign=1) or a deleted one (sign=-1)"""
+        revenue = order.total if order.status != 'cancelled' else 0.0
+        pending = 1 if order.status == 'pending' else 0
+        cls.apply(orders=sign, revenue=sign * revenue, pending=sign * pending)
+
+    @classmethod
+    def record_status_change(cls, order, old_status, new_status):
+        """Adjust pending/revenue counters for an order status change"""
+        pending = (new_status == 'pending') - (old_status == 'pending')
+        revenue = ((old_status == 'cancelled') - (new_status == 'cancelled')) * order.total
+        if pending or revenue:
+            cls.apply(revenue=revenue, pending=pending)
+
+    @classmethod
+    def compute(cls):
+        """Aggregate the counters from scratch"""
+        return {
+            'total_orders': Order.query.count(),
+            'total_products': Product.query.count(),
+            'total_revenue': float(db.session.query(db.func.sum(Order.total)).filter(
+                Order.status != 'cancelled'
+            ).scalar() or 0),
+            'pending_orders': Order.query.filter_by(status='pending').count()
+        }
+
+    @classmethod
+    def reconcile(cls):
+        """Rebuild the summary row from the source tables and commit"""
+        # Lock the row first so concurrent deltas land after the rebuild
+        stats = db.session.get(cls, cls.SINGLETON_ID, with_for_update=True)
+        values = cls.compute()
+        if stats is None:
+            stats = cls(id=cls.SINGLETON_ID)
+            db.session.add(stats)
+        for key, value in values.items():
+            setattr(stats, key, value)
+        db.session.commit()
+        return stats
+
+    @classmethod
+    def current(cls):
+        """Return the summary row, building it on first use"""
+        stats = db.session.get(cls, cls.SINGLETON_ID)
+        if stats is None:
+            try:
+                stats = cls.reconcile()
+            except IntegrityError:
+                # Another worker built it first
+                db.session.rollback()
+                stats = db.session.get(cls, cls.SINGLETON_ID)
+        return stats
+
+    def to_dict(self):
+        """Convert stats to dictionary"""
+        return {
+            'total_orders': self.total_orders,
+            'total_products': self.total_products,
+            'total_revenue': round(float(self.total_revenue), 2) or 0.0,
+            'pending_orders': self.pending_orders
+        }
+
+
+class SalesHourly(db.Model):
+    """Hourly rollup of non-cancelled orders, bucketed by order creation time"""
+    __tablename__ = 'sales_hourly'
+
+    bucket = db.Column(db.DateTime, primary_key=True)  # Start of the hour (UTC)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)  # Order totals incl. shipping
+
+
+class ProductSalesDaily(db.Model):
+    """Daily per-product rollup of non-cancelled order items"""
+    __tablename__ = 'product_sales_daily'
+
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(50))  # Category at the time of the first sale that day
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)  # Item subtotals
+
+
+class CategorySalesDaily(db.Model):
+    """Daily per-category rollup; an order counts once per category it touches"""
+    __tablename__ = 'category_sales_daily'
+
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)  # Item subtotals
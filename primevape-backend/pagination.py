@@ -0,0 +1,92 @@
+"""
+Page-number and cursor (keyset) pagination for listing endpoints
+
+Listings are ordered newest first on (created_at, id). Passing a `cursor`
+query parameter (empty for the first page) switches an endpoint to keyset
+mode: instead of OFFSET n plus a COUNT(*), the next page is fetched with
+WHERE (created_at, id) < (last created_at, last id), so page 500 costs the
+same as page 1. The response then carries an opaque `next_cursor` (null on
+the last page) and only includes `total` when `include_total=true` is sent.
+Without `cursor` the endpoints keep their page/per_page behaviour.
+"""
+
+import base64
+import json
+from datetime import datetime
+from flask import request
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token can't be decoded"""
+
+
+def encode_cursor(created_at, row_id):
+    """Build an opaque cursor pointing after the given row"""
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor into (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def wants_cursor():
+    """True if the request asked for cursor pagination"""
+    return 'cursor' in request.args
+
+
+def cursor_params():
+    """Cursor, total flag and cache-key parts from the request"""
+    return (
+        request.args.get('cursor') if wants_cursor() else None,
+        request.args.get('include_total', '').lower() in ('1', 'true', 'yes')
+    )
+
+
+def paginate(query, model, default_per_page):
+    """Paginate query newest first, by page number or by cursor
+
+    Returns (items, meta) where meta holds the pagination fields to merge
+    into the response body.
+    """
+    per_page = request.args.get('per_page', default_per_page, type=int)
+    ordering = (model.created_at.desc(), model.id.desc())
+
+    if not wants_cursor():
+        page = request.args.get('page', 1, type=int)
+        result = query.order_by(*ordering).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        return result.items, {
+            'total': result.total,
+            'pages': result.pages,
+            'current_page': result.page
+        }
+
+    cursor, include_total = cursor_params()
+    meta = {}
+    if include_total:
+        meta['total'] = query.order_by(None).count()
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id)
+        ))
+
+    per_page = max(per_page, 1)
+    items = query.order_by(*ordering).limit(per_page + 1).all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+
+    last = items[-1] if items else None
+    meta['next_cursor'] = encode_cursor(last.created_at, last.id) if has_more else None
+    return items, meta
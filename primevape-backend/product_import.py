@@ -0,0 +1,231 @@
+"""
+Bulk product import for the admin API
+
+Rows arrive as a JSON array, NDJSON or CSV (request body or a multipart
+`file` upload) and are matched to existing products by name, since products
+have no SKU. CSV and NDJSON bodies are read line by line, so large uploads
+are never held in memory at once.
+
+Valid rows are applied in batches: one IN query finds the existing products,
+one executemany UPDATE rewrites them and one executemany INSERT adds the new
+ones, then the batch commits. The catalog cache, search index and dashboard
+stats are refreshed once per batch. Invalid rows are skipped and reported
+with their row number; the rest of the import still goes through.
+"""
+
+import csv
+import io
+import json
+from sqlalchemy import insert, update
+from models import db, Product, StoreStats
+from cache import catalog_cache
+from search import search_index
+
+BATCH_SIZE = 500
+
+REQUIRED_FIELDS = ['name', 'description', 'price', 'category', 'stock']
+
+# Defaults for optional fields on new products, matching create_product
+NEW_PRODUCT_DEFAULTS = {'image': '', 'featured': False, 'is_active': True}
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y')
+FALSE_VALUES = ('0', 'false', 'no', 'n')
+
+
+class ImportFormatError(ValueError):
+    """Raised when an upload can't be read as rows at all"""
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f'expected true or false, got {value!r}')
+
+
+def _to_price(value):
+    price = float(value)
+    if price < 0:
+        raise ValueError('must not be negative')
+    return price
+
+
+def _to_stock(value):
+    stock = int(value)
+    if stock < 0:
+        raise ValueError('must not be negative')
+    return stock
+
+
+def _to_text(value):
+    return str(value).strip()
+
+
+CONVERTERS = {
+    'name': _to_text,
+    'description': _to_text,
+    'category': _to_text,
+    'image': _to_text,
+    'price': _to_price,
+    'stock': _to_stock,
+    'featured': _to_bool,
+    'is_active': _to_bool,
+}
+
+
+def clean_row(raw):
+    """Validate and convert one row, returning the known fields it sets
+
+    Blank CSV cells count as "not provided", so an update row only needs the
+    name plus the columns it changes.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError('Row must be an object')
+
+    row = {}
+    for field, convert in CONVERTERS.items():
+        value = raw.get(field)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        try:
+            row[field] = convert(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f'Invalid {field}: {e}')
+
+    if not row.get('name'):
+        raise ValueError('Missing required field: name')
+    if len(row['name']) > 200:
+        raise ValueError('Invalid name: longer than 200 characters')
+    return row
+
+
+def _text_stream(stream):
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def read_rows(request):
+    """Yield raw row dicts from a JSON, NDJSON or CSV request"""
+    upload = request.files.get('file')
+    if upload is not None:
+        name = (upload.filename or '').lower()
+        stream = upload.stream
+        kind = 'json' if name.endswith('.json') else 'ndjson' if name.endswith('.ndjson') else 'csv'
+    else:
+        stream = request.stream
+        mimetype = request.mimetype
+        if mimetype == 'application/json':
+            kind = 'json'
+        elif mimetype in ('application/x-ndjson', 'application/ndjson'):
+            kind = 'ndjson'
+        elif mimetype in ('text/csv', 'application/csv'):
+            kind = 'csv'
+        else:
+            raise ImportFormatError('Send JSON, NDJSON or CSV, or upload a file')
+
+    if kind == 'json':
+        try:
+            data = json.load(_text_stream(stream))
+        except ValueError:
+            raise ImportFormatError('Invalid JSON body')
+        if isinstance(data, dict):
+            data = data.get('products')
+        if not isinstance(data, list):
+            raise ImportFormatError('Expected a JSON array of products')
+        yield from data
+
+    elif kind == 'ndjson':
+        for line in _text_stream(stream):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Reported against this row by the caller
+                yield None
+
+    else:
+        yield from csv.DictReader(_text_stream(stream))
+
+
+def _apply_batch(batch):
+    """Upsert one batch of (row_number, row) pairs and commit
+
+    Returns (created, updated, errors).
+    """
+    errors = []
+
+    # Later rows for the same name override earlier ones
+    merged = {}
+    for number, row in batch:
+        merged.setdefault(row['name'], [number, {}])[1].update(row)
+        merged[row['name']][0] = number
+
+    existing = {}
+    for product_id, name in db.session.query(Product.id, Product.name)\
+            .filter(Product.name.in_(list(merged))):
+        existing.setdefault(name, []).append(product_id)
+
+    updates = []
+    inserts = []
+    for name, (number, row) in merged.items():
+        ids = existing.get(name)
+        if ids and len(ids) > 1:
+            errors.append({'row': number, 'error': f'{len(ids)} products are named {name!r}, update them individually'})
+        elif ids:
+            updates.append({'id': ids[0], **row})
+        else:
+            missing = [field for field in REQUIRED_FIELDS if field not in row]
+            if missing:
+                errors.append({'row': number, 'error': f'Missing required field for a new product: {", ".join(missing)}'})
+            else:
+                inserts.append({**NEW_PRODUCT_DEFAULTS, **row})
+
+    if updates:
+        db.session.execute(update(Product), updates)
+    if inserts:
+        db.session.execute(insert(Product), inserts)
+        StoreStats.apply(products=len(inserts))
+    db.session.commit()
+
+    if updates or inserts:
+        catalog_cache.invalidate()
+        search_index.reset()
+    return len(inserts), len(updates), errors
+
+
+def import_products(rows, batch_size=BATCH_SIZE):
+    """Validate and upsert rows in batches
+
+    Returns a summary with created/updated counts and per-row errors.
+    Row numbers are 1-based positions in the upload (excluding a CSV header).
+    """
+    summary = {'rows': 0, 'created': 0, 'updated': 0, 'errors': []}
+    batch = []
+
+    def flush():
+        created, updated, errors = _apply_batch(batch)
+        summary['created'] += created
+        summary['updated'] += updated
+        summary['errors'].extend(errors)
+        batch.clear()
+
+    for number, raw in enumerate(rows, 1):
+        summary['rows'] = number
+        try:
+            batch.append((number, clean_row(raw)))
+        except ValueError as e:
+            summary['errors'].append({'row': number, 'error': str(e)})
+            continue
+
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    summary['errors'].sort(key=lambda error: error['row'])
+    return summary
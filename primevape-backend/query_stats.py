@@ -0,0 +1,148 @@
+"""
+Per-request SQL instrumentation
+
+Every statement the engine executes during a request is counted and timed.
+When the response is sent:
+
+- a Server-Timing header reports DB time, query count and total time, so
+  browser devtools show them next to each request
+- a JSON log line goes to the `primevape.sql` logger, at WARNING when a
+  statement shape ran SQL_REPEAT_THRESHOLD or more times (the usual N+1
+  signature) and at INFO otherwise
+- in testing, a request that issues more than SQL_QUERY_BUDGET statements
+  raises QueryBudgetExceeded, so the test that made it fails
+
+Statements are grouped by fingerprint: whitespace is collapsed and expanded
+IN lists are folded, so `IN (?, ?, ?)` and `IN (?)` count as the same shape.
+Queries run while a streamed response body is generated happen after the
+headers are sent and are not included.
+"""
+
+import json
+import logging
+import re
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from models import db
+
+PLACEHOLDER = r'(?:\?|%\([^)]*\)s|%s|\$\d+|:\w+)'
+IN_LIST_RE = re.compile(rf'\(\s*{PLACEHOLDER}(?:\s*,\s*{PLACEHOLDER})+\s*\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in testing when a request issues more statements than allowed"""
+
+
+def _abbreviate(shape, limit=240):
+    # Keep both the table list and the WHERE clause of long statements
+    if len(shape) <= limit:
+        return shape
+    half = limit // 2
+    return f'{shape[:half]} … {shape[-half:]}'
+
+
+def fingerprint(statement):
+    """Normalized shape of a SQL statement"""
+    statement = WHITESPACE_RE.sub(' ', statement).strip()
+    return IN_LIST_RE.sub('(?)', statement)
+
+
+class RequestQueries:
+    """Statements executed during one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = {}
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        shape = fingerprint(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def repeated(self, threshold):
+        """Statement shapes run at least threshold times, most frequent first"""
+        return sorted(
+            ((shape, count) for shape, count in self.shapes.items() if count >= threshold),
+            key=lambda item: -item[1]
+        )
+
+
+class QueryInstrumentation:
+    """Flask extension wiring the engine events to request hooks"""
+
+    def __init__(self):
+        self.logger = logging.getLogger('primevape.sql')
+
+    def init_app(self, app):
+        """Listen on the app's engine and add the request hooks"""
+        if not app.config.get('SQL_INSTRUMENTATION', True):
+            return
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    # The start time lives on the statement's execution context, so a
+    # statement that raises leaves nothing behind on the pooled connection
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_query_start', None)
+        if started is not None and has_request_context():
+            queries = g.get('sql_queries')
+            if queries is not None:
+                queries.record(statement, time.perf_counter() - started)
+
+    def _start_request(self):
+        g.sql_queries = RequestQueries()
+
+    def _finish_request(self, response):
+        queries = g.pop('sql_queries', None)
+        if queries is None:
+            return response
+
+        total_ms = (time.perf_counter() - queries.started) * 1000
+        db_ms = queries.duration * 1000
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={db_ms:.1f};desc="{queries.count} queries", total;dur={total_ms:.1f}'
+        )
+
+        repeated = queries.repeated(current_app.config.get('SQL_REPEAT_THRESHOLD', 5))
+        line = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': queries.count,
+            'db_ms': round(db_ms, 2),
+            'total_ms': round(total_ms, 2)
+        }
+        if repeated:
+            line['repeated'] = [{'statement': _abbreviate(shape), 'count': count} for shape, count in repeated]
+            self.logger.warning(json.dumps(line))
+        else:
+            self.logger.info(json.dumps(line))
+
+        # Budgets only fail requests under test, never in production
+        budget = current_app.config.get('SQL_QUERY_BUDGET')
+        if current_app.testing and budget is not None and queries.count > budget:
+            raise QueryBudgetExceeded(
+                f'{request.method} {request.path} issued {queries.count} queries (budget {budget})'
+            )
+
+        return response
+
+
+query_stats = QueryInstrumentation()
@@ -0,0 +1,36 @@
+"""
+Rebuild the admin dashboard counters and sales rollups from the source tables
+
+The store_stats row and the sales rollup tables are maintained incrementally
+by the API. Run this after importing data behind the API's back, after an
+upgrade adds a rollup table, or if the counters ever drift.
+
+Usage:
+    python reconcile_stats.py
+"""
+
+import os
+from app import create_app
+from models import StoreStats
+from analytics import rebuild_rollups
+
+
+def reconcile():
+    """Recompute and store the dashboard counters"""
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+
+    with app.app_context():
+        print("📝 Rebuilding dashboard stats...")
+        stats = StoreStats.reconcile()
+        for key, value in stats.to_dict().items():
+            print(f"   • {key}: {value}")
+        print("✅ Stats reconciled")
+        print()
+
+        print("📝 Rebuilding sales rollups...")
+        hours, product_days, category_days = rebuild_rollups()
+        print(f"✅ Rebuilt {hours} hourly, {product_days} product-day and {category_days} category-day rollups")
+
+
+if __name__ == '__main__':
+    reconcile()
@@ -1,23 +1,25 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Product, Order, Category
-from functools import wraps
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import insert
+from models import db, User, Product, Order, Category, StoreStats, InventoryAdjustment
+from cache import catalog_cache
+from auth_utils import admin_required, revoke_tokens
+from hashing import HashingPoolSaturated
+from pagination import paginate, InvalidCursor
+from search import search_index
+from metrics import metrics
+from serializers import order_listing, user_rows, inventory_rows, attach_items, InvalidFields
+import analytics
+import export
+import product_import
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
-def admin_required(fn):
-    """Decorator to require admin role"""
-    @wraps(fn)
-    @jwt_required()
-    def wrapper(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+MAX_STOCK_ADJUSTMENTS = 1000
 
-        if not user or not user.is_admin:
-            return jsonify({'error': 'Admin access required'}), 403
 
-        return fn(*args, **kwargs)
-    return wrapper
+def _ledger_text(value):
+    return str(value)[:100] if value is not None else None
 
 
 # ============ ORDER MANAGEMENT ============
@@ -27,8 +29,6 @@ def admin_required(fn):
 def get_all_orders():
     """Get all orders with pagination and filtering"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
         status_filter = request.args.get('status', None)
 
         query = Order.query
@@ -36,17 +36,20 @@ def get_all_orders():
         if status_filter:
             query = query.filter_by(status=status_filter)
 
-        orders = query.order_by(Order.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        serializer, with_items = order_listing()
+        orders, meta = paginate(serializer.select(query), Order, 20)
+        orders = serializer.dump_all(orders)
+        if with_items:
+            attach_items(orders)
 
         return jsonify({
-            'orders': [order.to_dict() for order in orders.items],
-            'total': orders.total,
-            'pages': orders.pages,
-            'current_page': page
+            'orders': orders,
+            **meta
         }), 200
 
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -56,7 +59,7 @@ def get_all_orders():
 def get_order_details(order_id):
     """Get detailed information about a specific order"""
     try:
-        order = Order.query.get_or_404(order_id)
+        order = Order.with_items().filter_by(id=order_id).first_or_404()
         return jsonify(order.to_dict()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 404
@@ -76,8 +79,16 @@ def update_order_status(order_id):
         if new_status not in valid_statuses:
             return jsonify({'error': 'Invalid status'}), 400
 
-        order.status = new_status
+        old_status = order.status
+        if not Order.transition(order.id, old_status, new_status):
+            db.session.rollback()
+            return jsonify({'error': 'Order status changed concurrently, please retry'}), 409
+        StoreStats.record_status_change(order, old_status, new_status)
+        analytics.record_status_change(order, old_status, new_status)
         db.session.commit()
+        metrics.record_status_change(old_status, new_status)
+
+        order = Order.with_items().filter_by(id=order.id).first()
 
         return jsonify({
             'message': 'Order status updated successfully',
@@ -95,6 +106,9 @@ def delete_order(order_id):
     """Delete an order"""
     try:
         order = Order.query.get_or_404(order_id)
+        StoreStats.record_order(order, sign=-1)
+        if order.status != 'cancelled':
+            analytics.record_order_sales(order, sign=-1)
         db.session.delete(order)
         db.session.commit()
 
@@ -130,7 +144,10 @@ def create_product():
         )
 
         db.session.add(product)
+        StoreStats.apply(products=1)
         db.session.commit()
+        catalog_cache.invalidate()
+        search_index.update(product)
 
         return jsonify({
             'message': 'Product created successfully',
@@ -169,6 +186,8 @@ def update_product(product_id):
             product.is_active = data['is_active']
 
         db.session.commit()
+        catalog_cache.invalidate()
+        search_index.update(product)
 
         return jsonify({
             'message': 'Product updated successfully',
@@ -187,7 +206,10 @@ def delete_product(product_id):
     try:
         product = Product.query.get_or_404(product_id)
         db.session.delete(product)
+        StoreStats.apply(products=-1)
         db.session.commit()
+        catalog_cache.invalidate()
+        search_index.remove(product_id)
 
         return jsonify({'message': 'Product deleted successfully'}), 200
     except Exception as e:
@@ -195,6 +217,127 @@ def delete_product(product_id):
         return jsonify({'error': str(e)}), 500
 
 
+@admin_bp.route('/products/import', methods=['POST'])
+@admin_required
+def import_products():
+    """Create or update many products from JSON, NDJSON or CSV, matched by name"""
+    try:
+        summary = product_import.import_products(product_import.read_rows(request))
+
+        if not summary['rows']:
+            return jsonify({'error': 'No rows to import'}), 400
+
+        return jsonify({
+            'message': f"Imported {summary['created'] + summary['updated']} of {summary['rows']} rows",
+            **summary
+        }), 200
+
+    except product_import.ImportFormatError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/products/stock', methods=['POST'])
+@admin_required
+def adjust_stock():
+    """Apply relative stock deltas to many products in one transaction
+
+    Either every adjustment is applied or none is. Each one is a relative
+    UPDATE, so checkouts running at the same time are never overwritten.
+    """
+    try:
+        data = request.get_json() or {}
+        items = data.get('adjustments')
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'adjustments must be a non-empty list'}), 400
+        if len(items) > MAX_STOCK_ADJUSTMENTS:
+            return jsonify({'error': f'At most {MAX_STOCK_ADJUSTMENTS} adjustments per request'}), 400
+
+        adjustments = []
+        for index, item in enumerate(items):
+            try:
+                adjustments.append({
+                    'index': index,
+                    'product_id': int(item['product_id']),
+                    'delta': int(item['delta']),
+                    'reason': _ledger_text(item.get('reason', data.get('reason'))),
+                    'reference': _ledger_text(item.get('reference', data.get('reference')))
+                })
+            except (KeyError, TypeError, ValueError, AttributeError):
+                return jsonify({'error': f'Invalid adjustment at index {index}'}), 400
+
+        product_ids = {a['product_id'] for a in adjustments}
+        found = {row.id for row in db.session.query(Product.id).filter(Product.id.in_(product_ids))}
+        missing = sorted(product_ids - found)
+        if missing:
+            return jsonify({'error': 'Products not found', 'product_ids': missing}), 404
+
+        # Lock rows in id order so concurrent batches can't deadlock
+        errors = []
+        for adjustment in sorted(adjustments, key=lambda a: (a['product_id'], a['index'])):
+            stock = Product.adjust_stock(adjustment['product_id'], adjustment['delta'])
+            if stock is None:
+                errors.append({
+                    'index': adjustment['index'],
+                    'product_id': adjustment['product_id'],
+                    'error': 'Adjustment would take stock below zero'
+                })
+            adjustment['stock_after'] = stock
+
+        if errors:
+            db.session.rollback()
+            return jsonify({'error': 'No adjustments were applied', 'errors': errors}), 409
+
+        user_id = int(get_jwt_identity())
+        db.session.execute(insert(InventoryAdjustment), [{
+            'product_id': a['product_id'],
+            'delta': a['delta'],
+            'stock_after': a['stock_after'],
+            'reason': a['reason'],
+            'reference': a['reference'],
+            'user_id': user_id
+        } for a in adjustments])
+        db.session.commit()
+        catalog_cache.invalidate()
+
+        # The last adjustment of each product holds its resulting level
+        levels = {}
+        for adjustment in sorted(adjustments, key=lambda a: (a['product_id'], a['index'])):
+            levels[adjustment['product_id']] = adjustment['stock_after']
+
+        return jsonify({
+            'message': f'Applied {len(adjustments)} stock adjustments',
+            'stock': [{'product_id': product_id, 'stock': stock} for product_id, stock in levels.items()]
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/products/<int:product_id>/inventory', methods=['GET'])
+@admin_required
+def get_inventory_history(product_id):
+    """Get the stock adjustment ledger of a product, newest first"""
+    try:
+        query = inventory_rows.select(InventoryAdjustment.query.filter_by(product_id=product_id))
+        adjustments, meta = paginate(query, InventoryAdjustment, 50)
+
+        return jsonify({
+            'adjustments': inventory_rows.dump_all(adjustments),
+            **meta
+        }), 200
+
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ============ DASHBOARD STATS ============
 
 @admin_bp.route('/stats', methods=['GET'])
@@ -202,22 +345,60 @@ def delete_product(product_id):
 def get_dashboard_stats():
     """Get dashboard statistics"""
     try:
-        total_orders = Order.query.count()
-        total_products = Product.query.count()
+        return jsonify(StoreStats.current().to_dict()), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # Calculate revenue excluding cancelled orders
-        total_revenue = db.session.query(db.func.sum(Order.total)).filter(
-            Order.status != 'cancelled'
-        ).scalar() or 0
 
-        pending_orders = Order.query.filter_by(status='pending').count()
+@admin_bp.route('/analytics', methods=['GET'])
+@admin_required
+def get_sales_analytics():
+    """Get revenue, orders, units and average order value over a date range"""
+    try:
+        interval = request.args.get('interval', 'day')
+        if interval not in analytics.INTERVALS:
+            return jsonify({'error': f'Invalid interval. Must be one of: {", ".join(analytics.INTERVALS)}'}), 400
 
-        return jsonify({
-            'total_orders': total_orders,
-            'total_products': total_products,
-            'total_revenue': float(total_revenue),
-            'pending_orders': pending_orders
-        }), 200
+        try:
+            start, end = analytics.parse_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid date range: {e}'}), 400
+
+        limit = request.args.get('limit', 20, type=int)
+        return jsonify(analytics.sales_report(start, end, interval, limit)), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# ============ DATA EXPORT ============
+
+@admin_bp.route('/export/<string:name>', methods=['GET'])
+@admin_required
+def export_data(name):
+    """Stream orders, order-items or users as CSV or NDJSON"""
+    try:
+        if name not in export.EXPORTS:
+            return jsonify({'error': f'Unknown export. Must be one of: {", ".join(export.EXPORTS)}'}), 404
+
+        fmt = request.args.get('format', 'csv')
+        if fmt not in export.FORMATS:
+            return jsonify({'error': f'Invalid format. Must be one of: {", ".join(export.FORMATS)}'}), 400
+
+        try:
+            start, end = export.parse_dates(request.args)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid date: {e}'}), 400
+
+        status = request.args.get('status')
+        body = export.stream_export(name, fmt, start, end, status)
+
+        return Response(
+            stream_with_context(body),
+            mimetype=export.FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename={name}.{fmt}'}
+        )
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -245,20 +426,16 @@ def get_categories():
 def get_all_users():
     """Get all users with pagination"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-
-        users = User.query.order_by(User.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        users, meta = paginate(user_rows.select(User.query), User, 20)
 
         return jsonify({
-            'users': [user.to_dict() for user in users.items],
-            'total': users.total,
-            'pages': users.pages,
-            'current_page': page
+            'users': user_rows.dump_all(users),
+            **meta
         }), 200
 
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -294,6 +471,8 @@ def update_user(user_id):
             user.name = data['name']
 
         if 'is_admin' in data:
+            if bool(data['is_admin']) != bool(user.is_admin):
+                revoke_tokens(user)
             user.is_admin = data['is_admin']
 
         db.session.commit()
@@ -320,6 +499,14 @@ def delete_user(user_id):
             return jsonify({'error': 'Cannot delete your own account'}), 400
 
         user = User.query.get_or_404(user_id)
+        revoke_tokens(user)
+
+        # Their orders are deleted with them
+        for order in user.orders:
+            StoreStats.record_order(order, sign=-1)
+            if order.status != 'cancelled':
+                analytics.record_order_sales(order, sign=-1)
+
         db.session.delete(user)
         db.session.commit()
 
@@ -360,6 +547,10 @@ def create_user():
             'user': user.to_dict()
         }), 201
 
+    except HashingPoolSaturated:
+        db.session.rollback()
+        return jsonify({'error': 'Server is busy, please try again'}), 503, {'Retry-After': '1'}
+
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
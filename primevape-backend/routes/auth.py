@@ -1,9 +1,8 @@
 from flask import Blueprint, request, jsonify
 from models import db, User
-from flask_jwt_extended import (
-    create_access_token, create_refresh_token,
-    jwt_required, get_jwt_identity
-)
+from hashing import HashingPoolSaturated
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from auth_utils import create_tokens, token_claims
 from email_validator import validate_email, EmailNotValidError
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
@@ -53,8 +52,7 @@ def register():
         db.session.commit()
 
         # Create tokens
-        access_token = create_access_token(identity=str(user.id))
-        refresh_token = create_refresh_token(identity=str(user.id))
+        access_token, refresh_token = create_tokens(user)
 
         return jsonify({
             'message': 'User registered successfully',
@@ -63,6 +61,10 @@ def register():
             'refresh_token': refresh_token
         }), 201
 
+    except HashingPoolSaturated:
+        db.session.rollback()
+        return jsonify({'error': 'Server is busy, please try again'}), 503, {'Retry-After': '1'}
+
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -85,9 +87,13 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid email or password'}), 401
 
+        # Upgrade hashes created with a different bcrypt cost
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+
         # Create tokens
-        access_token = create_access_token(identity=str(user.id))
-        refresh_token = create_refresh_token(identity=str(user.id))
+        access_token, refresh_token = create_tokens(user)
 
         return jsonify({
             'message': 'Login successful',
@@ -96,6 +102,10 @@ def login():
             'refresh_token': refresh_token
         }), 200
 
+    except HashingPoolSaturated:
+        db.session.rollback()
+        return jsonify({'error': 'Server is busy, please try again'}), 503, {'Retry-After': '1'}
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -106,7 +116,16 @@ def refresh():
     """Refresh access token"""
     try:
         current_user_id = int(get_jwt_identity())
-        access_token = create_access_token(identity=str(current_user_id))
+        user = User.query.get(current_user_id)
+
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        # Re-read the role so promotions take effect on the next refresh
+        access_token = create_access_token(
+            identity=str(current_user_id),
+            additional_claims=token_claims(user)
+        )
 
         return jsonify({
             'access_token': access_token
@@ -202,6 +221,10 @@ def change_password():
 
         return jsonify({'message': 'Password changed successfully'}), 200
 
+    except HashingPoolSaturated:
+        db.session.rollback()
+        return jsonify({'error': 'Server is busy, please try again'}), 503, {'Retry-After': '1'}
+
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
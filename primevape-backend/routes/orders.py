@@ -1,6 +1,15 @@
 from flask import Blueprint, request, jsonify
-from models import db, Order, OrderItem, Product
+from models import db, Order, OrderItem, Product, StoreStats
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from auth_utils import admin_required
+from cache import catalog_cache
+from metrics import metrics
+from pagination import paginate, InvalidCursor
+from serializers import order_listing, attach_items, InvalidFields
+from idempotency import IdempotencyError
+import analytics
+import idempotency
+from sqlalchemy import insert
 import uuid
 from datetime import datetime
 
@@ -15,23 +24,50 @@ def create_order():
         current_user_id = int(get_jwt_identity())
         data = request.get_json()
 
+        # A retry with the same Idempotency-Key gets the first response back
+        key = request.headers.get('Idempotency-Key')
+        claimed = None
+        if key is not None:
+            claimed, replayed = idempotency.claim(current_user_id, key, data)
+            if replayed is not None:
+                return replayed
+
         # Validate required fields
         if 'items' not in data or not data['items']:
             return jsonify({'error': 'Order items are required'}), 400
 
-        # Calculate totals and validate products
+        # Ids and quantities must be JSON integers (not floats, strings or booleans)
+        lines = []
+        for item in data['items']:
+            if not isinstance(item, dict):
+                return jsonify({'error': 'Invalid order items'}), 400
+            line = (item.get('product_id'), item.get('quantity', 1))
+            if any(isinstance(value, bool) or not isinstance(value, int) for value in line):
+                return jsonify({'error': 'Invalid order items'}), 400
+            lines.append(line)
+
+        # Load every referenced product in a single query
+        product_ids = {product_id for product_id, _ in lines}
+        products = Product.query.filter(Product.id.in_(product_ids)).all()
+        products_by_id = {product.id: product for product in products}
+
+        # Calculate totals and validate products (stock is only a fast-fail
+        # check here, the reservation below is authoritative)
         subtotal = 0
         order_items = []
+        requested = {}
 
-        for item in data['items']:
-            product = Product.query.get(item.get('product_id'))
+        for product_id, quantity in lines:
+            product = products_by_id.get(product_id)
             if not product or not product.is_active:
-                return jsonify({'error': f'Product {item.get("product_id")} not found'}), 404
+                return jsonify({'error': f'Product {product_id} not found'}), 404
 
-            quantity = item.get('quantity', 1)
+            if quantity < 1:
+                return jsonify({'error': f'Invalid quantity for {product.name}'}), 400
 
-            # Check stock
-            if product.stock < quantity:
+            # Check stock (the same product may appear on several lines)
+            requested[product.id] = requested.get(product.id, 0) + quantity
+            if product.stock < requested[product.id]:
                 return jsonify({'error': f'Insufficient stock for {product.name}'}), 400
 
             item_subtotal = product.price * quantity
@@ -68,25 +104,48 @@ def create_order():
         db.session.add(order)
         db.session.flush()  # Get order ID
 
-        # Create order items and update stock
-        for item in order_items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=item['product'].id,
-                quantity=item['quantity'],
-                price=item['price']
-            )
-            db.session.add(order_item)
+        # Reserve stock atomically, in id order so concurrent checkouts lock
+        # rows in the same sequence
+        for product_id in sorted(requested):
+            if not Product.reserve_stock(product_id, requested[product_id]):
+                db.session.rollback()
+                product = products_by_id[product_id]
+                return jsonify({'error': f'Insufficient stock for {product.name}'}), 400
 
-            # Update product stock
-            item['product'].stock -= item['quantity']
+        # Create order items in one batched INSERT
+        db.session.execute(insert(OrderItem), [
+            {
+                'order_id': order.id,
+                'product_id': item['product'].id,
+                'quantity': item['quantity'],
+                'price': item['price']
+            }
+            for item in order_items
+        ])
+
+        StoreStats.record_order(order)
+        analytics.record_order_sales(order, [
+            (item['product'].id, item['quantity'], item['price']) for item in order_items
+        ])
+
+        # Built before the commit so an idempotency key commits with its response
+        order = Order.with_items().filter_by(id=order.id).first()
+        body = {
+            'message': 'Order created successfully',
+            'order': order.to_dict()
+        }
+        if claimed is not None:
+            idempotency.save(claimed, order.id, body, 201)
 
         db.session.commit()
+        catalog_cache.invalidate()  # Stock changed
+        metrics.record_order(order)
 
-        return jsonify({
-            'message': 'Order created successfully',
-            'order': order.to_dict()
-        }), 201
+        return jsonify(body), 201
+
+    except IdempotencyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status_code
 
     except Exception as e:
         db.session.rollback()
@@ -99,20 +158,22 @@ def get_user_orders():
     """Get all orders for the current user"""
     try:
         current_user_id = int(get_jwt_identity())
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
 
-        orders = Order.query.filter_by(user_id=current_user_id)\
-            .order_by(Order.created_at.desc())\
-            .paginate(page=page, per_page=per_page, error_out=False)
+        query = Order.query.filter_by(user_id=current_user_id)
+        serializer, with_items = order_listing()
+        orders, meta = paginate(serializer.select(query), Order, 10)
+        orders = serializer.dump_all(orders)
+        if with_items:
+            attach_items(orders)
 
         return jsonify({
-            'orders': [order.to_dict() for order in orders.items],
-            'total': orders.total,
-            'pages': orders.pages,
-            'current_page': orders.page
+            'orders': orders,
+            **meta
         }), 200
 
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -123,7 +184,7 @@ def get_order(order_id):
     """Get a specific order"""
     try:
         current_user_id = int(get_jwt_identity())
-        order = Order.query.get(order_id)
+        order = Order.with_items().filter_by(id=order_id).first()
 
         if not order:
             return jsonify({'error': 'Order not found'}), 404
@@ -157,16 +218,25 @@ def cancel_order(order_id):
         if order.status != 'pending':
             return jsonify({'error': 'Only pending orders can be cancelled'}), 400
 
-        # Update status
-        order.status = 'cancelled'
+        # Update status only if nobody else cancelled it in the meantime
+        if not Order.transition(order.id, 'pending', 'cancelled'):
+            db.session.rollback()
+            return jsonify({'error': 'Only pending orders can be cancelled'}), 400
+        StoreStats.record_status_change(order, 'pending', 'cancelled')
+        analytics.record_status_change(order, 'pending', 'cancelled')
 
         # Restore product stock
+        released = {}
         for item in order.items:
-            product = Product.query.get(item.product_id)
-            if product:
-                product.stock += item.quantity
+            released[item.product_id] = released.get(item.product_id, 0) + item.quantity
+        for product_id in sorted(released):
+            Product.release_stock(product_id, released[product_id])
 
         db.session.commit()
+        catalog_cache.invalidate()  # Stock changed
+        metrics.record_status_change('pending', 'cancelled')
+
+        order = Order.with_items().filter_by(id=order.id).first()
 
         return jsonify({
             'message': 'Order cancelled successfully',
@@ -179,19 +249,10 @@ def cancel_order(order_id):
 
 
 @orders_bp.route('/admin/all', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_orders():
     """Get all orders (Admin only)"""
     try:
-        from models import User
-        current_user_id = int(get_jwt_identity())
-        user = User.query.get(current_user_id)
-
-        if not user or not user.is_admin:
-            return jsonify({'error': 'Admin access required'}), 403
-
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
         status = request.args.get('status')
 
         query = Order.query
@@ -199,32 +260,29 @@ def get_all_orders():
         if status:
             query = query.filter_by(status=status)
 
-        orders = query.order_by(Order.created_at.desc())\
-            .paginate(page=page, per_page=per_page, error_out=False)
+        serializer, with_items = order_listing()
+        orders, meta = paginate(serializer.select(query), Order, 20)
+        orders = serializer.dump_all(orders)
+        if with_items:
+            attach_items(orders)
 
         return jsonify({
-            'orders': [order.to_dict() for order in orders.items],
-            'total': orders.total,
-            'pages': orders.pages,
-            'current_page': orders.page
+            'orders': orders,
+            **meta
         }), 200
 
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @orders_bp.route('/<int:order_id>/status', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_order_status(order_id):
     """Update order status (Admin only)"""
     try:
-        from models import User
-        current_user_id = int(get_jwt_identity())
-        user = User.query.get(current_user_id)
-
-        if not user or not user.is_admin:
-            return jsonify({'error': 'Admin access required'}), 403
-
         order = Order.query.get(order_id)
         if not order:
             return jsonify({'error': 'Order not found'}), 404
@@ -237,8 +295,16 @@ def update_order_status(order_id):
         if data['status'] not in valid_statuses:
             return jsonify({'error': f'Invalid status. Must be one of: {", ".join(valid_statuses)}'}), 400
 
-        order.status = data['status']
+        old_status = order.status
+        if not Order.transition(order.id, old_status, data['status']):
+            db.session.rollback()
+            return jsonify({'error': 'Order status changed concurrently, please retry'}), 409
+        StoreStats.record_status_change(order, old_status, data['status'])
+        analytics.record_status_change(order, old_status, data['status'])
         db.session.commit()
+        metrics.record_status_change(old_status, data['status'])
+
+        order = Order.with_items().filter_by(id=order.id).first()
 
         return jsonify({
             'message': 'Order status updated successfully',
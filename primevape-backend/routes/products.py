@@ -1,22 +1,39 @@
 from flask import Blueprint, request, jsonify
-from models import db, Product
-from functools import wraps
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, Product, StoreStats
+from cache import catalog_cache
+from compression import compression, CompressedBody
+from conditional import catalog_validators, content_etag, not_modified, add_validators
+from auth_utils import admin_required
+from pagination import paginate, cursor_params, InvalidCursor
+from search import search_products, search_index
+from serializers import product_rows, fields_param, InvalidFields
 
 products_bp = Blueprint('products', __name__, url_prefix='/api/products')
 
-def admin_required(fn):
-    """Decorator to require admin access"""
-    @wraps(fn)
-    @jwt_required()
-    def wrapper(*args, **kwargs):
-        from models import User
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        if not user or not user.is_admin:
-            return jsonify({'error': 'Admin access required'}), 403
-        return fn(*args, **kwargs)
-    return wrapper
+MAX_BATCH_PRODUCTS = 500
+CATEGORIES_KEY = ('categories',)
+
+
+def _batch_ids():
+    """Product ids from ?ids=1,2,3 or a JSON body {"ids": [...]}, deduplicated in order"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        ids = data.get('ids') if isinstance(data, dict) else None
+        if not isinstance(ids, list):
+            raise ValueError('Body must be {"ids": [...]}')
+    else:
+        ids = [part for part in request.args.get('ids', '').split(',') if part.strip()]
+
+    try:
+        ids = list(dict.fromkeys(int(product_id) for product_id in ids))
+    except (TypeError, ValueError):
+        raise ValueError('Product ids must be integers')
+
+    if not ids:
+        raise ValueError('At least one product id is required')
+    if len(ids) > MAX_BATCH_PRODUCTS:
+        raise ValueError(f'At most {MAX_BATCH_PRODUCTS} product ids per request')
+    return ids
 
 
 @products_bp.route('', methods=['GET'])
@@ -29,6 +46,27 @@ def get_products():
         search = request.args.get('search')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 100, type=int)
+        cursor, include_total = cursor_params()
+        fields = fields_param()
+        serializer = product_rows.only(fields)
+
+        cache_key = catalog_cache.make_key(
+            category, featured, search, page, per_page, cursor, include_total, fields
+        )
+
+        # Answer revalidations before building anything
+        validators = catalog_validators()
+        etag = validators.etag(*cache_key)
+        unchanged = not_modified(etag, validators.last_modified)
+        if unchanged is not None:
+            return unchanged
+
+        # Serve from the catalog cache when possible
+        cached = catalog_cache.get(cache_key)
+        if cached is not None and cached[0] == etag:
+            response = compression.response(cached[1])
+            return add_validators(response, etag, validators.last_modified), 200
+        cache_version = catalog_cache.version
 
         # Build query
         query = Product.query.filter_by(is_active=True)
@@ -38,20 +76,33 @@ def get_products():
             query = query.filter_by(category=category)
         if featured:
             query = query.filter_by(featured=True)
-        if search:
-            query = query.filter(Product.name.ilike(f'%{search}%'))
-
-        # Paginate
-        products = query.order_by(Product.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        query = serializer.select(query)
 
-        return jsonify({
-            'products': [p.to_dict() for p in products.items],
-            'total': products.total,
-            'pages': products.pages,
-            'current_page': products.page
-        }), 200
+        if search:
+            # Relevance-ranked results are paged by number only
+            if cursor is not None:
+                return jsonify({'error': 'Cursor pagination is not supported with search'}), 400
+
+            products, total = search_products(query, search, page, per_page)
+            meta = {
+                'total': total,
+                'pages': -(-total // max(per_page, 1)),
+                'current_page': page
+            }
+        else:
+            products, meta = paginate(query, Product, 100)
+
+        payload = {
+            'products': serializer.dump_all(products),
+            **meta
+        }
+        body = CompressedBody.from_response(jsonify(payload))
+        catalog_cache.store(cache_key, (etag, body), cache_version)
+
+        return add_validators(compression.response(body), etag, validators.last_modified), 200
+
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -61,11 +112,45 @@ def get_products():
 def get_product(product_id):
     """Get a single product by ID"""
     try:
+        validators = catalog_validators()
+        etag = validators.etag('product', product_id)
+        unchanged = not_modified(etag, validators.last_modified)
+        if unchanged is not None:
+            return unchanged
+
         product = Product.query.get(product_id)
         if not product or not product.is_active:
             return jsonify({'error': 'Product not found'}), 404
 
-        return jsonify(product.to_dict()), 200
+        return add_validators(jsonify(product.to_dict()), etag, validators.last_modified), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@products_bp.route('/batch', methods=['GET', 'POST'])
+def get_products_batch():
+    """Get several products by ID in one query (cart and checkout refresh)"""
+    try:
+        try:
+            ids = _batch_ids()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        serializer = product_rows.only(fields_param())
+        rows = serializer.select(
+            Product.query.filter(Product.id.in_(ids), Product.is_active.is_(True))
+        )
+        found = {row.id: serializer.dump(row) for row in rows}
+
+        # Keyed by id as a string, in the order the ids were requested
+        return jsonify({
+            'products': {str(product_id): found[product_id] for product_id in ids if product_id in found},
+            'missing': [product_id for product_id in ids if product_id not in found]
+        }), 200
+
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -96,7 +181,10 @@ def create_product():
         )
 
         db.session.add(product)
+        StoreStats.apply(products=1)
         db.session.commit()
+        catalog_cache.invalidate()
+        search_index.update(product)
 
         return jsonify({
             'message': 'Product created successfully',
@@ -138,6 +226,8 @@ def update_product(product_id):
             product.is_active = data['is_active']
 
         db.session.commit()
+        catalog_cache.invalidate()
+        search_index.update(product)
 
         return jsonify({
             'message': 'Product updated successfully',
@@ -161,6 +251,7 @@ def delete_product(product_id):
         # Soft delete - just mark as inactive
         product.is_active = False
         db.session.commit()
+        catalog_cache.invalidate()
 
         return jsonify({'message': 'Product deleted successfully'}), 200
 
@@ -173,11 +264,23 @@ def delete_product(product_id):
 def get_categories():
     """Get all product categories"""
     try:
-        from models import Category
-        categories = Category.query.filter_by(is_active=True).all()
-        return jsonify({
-            'categories': [c.to_dict() for c in categories]
-        }), 200
+        cached = catalog_cache.get(CATEGORIES_KEY)
+        if cached is None:
+            from models import Category
+            cache_version = catalog_cache.version
+            categories = Category.query.filter_by(is_active=True).all()
+            body = CompressedBody.from_response(jsonify({
+                'categories': [c.to_dict() for c in categories]
+            }))
+            cached = (content_etag(body.body), body)
+            catalog_cache.store(CATEGORIES_KEY, cached, cache_version)
+
+        etag, body = cached
+        unchanged = not_modified(etag)
+        if unchanged is not None:
+            return unchanged
+
+        return add_validators(compression.response(body), etag), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
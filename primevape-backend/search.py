@@ -0,0 +1,215 @@
+"""
+Full-text product search with relevance ranking
+
+On Postgres, products are matched against a weighted tsvector over name (A),
+category (B) and description (C), served by the ix_products_search GIN
+expression index and ranked with ts_rank. Every search word is matched as a
+prefix, so "mang" finds "Mango Ice" while the user is still typing.
+
+Other databases (SQLite in development) use an in-process inverted index with
+the same field weights and prefix semantics. It is built lazily on the first
+search and updated incrementally when products are created, updated or
+deleted through the API; other worker processes rebuild theirs after
+SEARCH_INDEX_TTL seconds.
+"""
+
+import re
+import time
+import threading
+from bisect import bisect_left
+from sqlalchemy import event, DDL, func, literal_column
+from models import db, Product
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Field weights shared by the Postgres vector and the in-process index
+FIELD_WEIGHTS = (('name', 'A', 3.0), ('category', 'B', 2.0), ('description', 'C', 1.0))
+
+
+def tokenize(text):
+    """Lowercase word tokens of text"""
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def search_vector():
+    """Weighted tsvector expression matching the ix_products_search index"""
+    config = literal_column("'simple'")
+    vector = None
+    for field, label, _ in FIELD_WEIGHTS:
+        part = func.setweight(
+            func.to_tsvector(config, func.coalesce(getattr(Product, field), '')),
+            literal_column(f"'{label}'")
+        )
+        vector = part if vector is None else vector.op('||')(part)
+    return vector
+
+
+PRODUCT_SEARCH_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_products_search ON products USING gin (("
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')))"
+)
+
+event.listen(
+    Product.__table__, 'after_create',
+    DDL(PRODUCT_SEARCH_DDL).execute_if(dialect='postgresql')
+)
+
+
+class InvertedIndex:
+    """In-process token -> product postings with prefix lookup"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._postings = {}
+        self._doc_terms = {}
+        self._terms = []
+        self._terms_dirty = False
+        self._built_at = None
+        self._lock = threading.RLock()
+
+    def init_app(self, app):
+        """Configure the rebuild interval and drop any built index"""
+        self.ttl = app.config.get('SEARCH_INDEX_TTL', self.ttl)
+        self.reset()
+
+    def reset(self):
+        """Forget everything; the next search rebuilds from the database"""
+        with self._lock:
+            self._postings = {}
+            self._doc_terms = {}
+            self._terms = []
+            self._built_at = None
+
+    def _add(self, product_id, fields):
+        weights = {}
+        for field, _, weight in FIELD_WEIGHTS:
+            for token in tokenize(fields.get(field)):
+                weights[token] = weights.get(token, 0.0) + weight
+
+        for token, weight in weights.items():
+            self._postings.setdefault(token, {})[product_id] = weight
+        self._doc_terms[product_id] = set(weights)
+        self._terms_dirty = True
+
+    def _remove(self, product_id):
+        for token in self._doc_terms.pop(product_id, ()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(product_id, None)
+                if not postings:
+                    del self._postings[token]
+                    self._terms_dirty = True
+
+    def _ensure_built(self):
+        if self._built_at is not None and time.monotonic() - self._built_at < self.ttl:
+            return
+
+        rows = db.session.query(
+            Product.id, Product.name, Product.category, Product.description
+        ).all()
+        self._postings = {}
+        self._doc_terms = {}
+        for row in rows:
+            self._add(row.id, row._asdict())
+        self._built_at = time.monotonic()
+
+    def update(self, product):
+        """Re-index a created or updated product"""
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._remove(product.id)
+            self._add(product.id, {
+                field: getattr(product, field) for field, _, _ in FIELD_WEIGHTS
+            })
+
+    def remove(self, product_id):
+        """Drop a deleted product from the index"""
+        with self._lock:
+            if self._built_at is not None:
+                self._remove(product_id)
+
+    def _expand(self, prefix):
+        if self._terms_dirty:
+            self._terms = sorted(self._postings)
+            self._terms_dirty = False
+
+        start = bisect_left(self._terms, prefix)
+        for term in self._terms[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def search(self, text):
+        """Return product ids matching every word of text, best first"""
+        words = tokenize(text)
+        if not words:
+            return []
+
+        with self._lock:
+            self._ensure_built()
+
+            scores = None
+            for word in words:
+                # Exact matches outrank prefix completions
+                matches = {}
+                for term in self._expand(word):
+                    boost = 1.0 if term == word else 0.5
+                    for product_id, weight in self._postings[term].items():
+                        matches[product_id] = max(matches.get(product_id, 0.0), weight * boost)
+
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {
+                        product_id: score + matches[product_id]
+                        for product_id, score in scores.items()
+                        if product_id in matches
+                    }
+                if not scores:
+                    return []
+
+        return sorted(scores, key=lambda product_id: (-scores[product_id], -product_id))
+
+
+search_index = InvertedIndex()
+
+
+def search_products(query, text, page, per_page):
+    """Filter query by a full-text search, ranked by relevance
+
+    Returns (products, total) for the requested page.
+    """
+    page = max(page, 1)
+    per_page = max(per_page, 1)
+    words = tokenize(text)
+    if not words:
+        return [], 0
+
+    if db.engine.dialect.name == 'postgresql':
+        tsquery = func.to_tsquery(
+            literal_column("'simple'"), ' & '.join(f'{word}:*' for word in words)
+        )
+        vector = search_vector()
+        query = query.filter(vector.op('@@')(tsquery))
+        total = query.order_by(None).count()
+        products = query.order_by(func.ts_rank(vector, tsquery).desc(), Product.id.desc())\
+            .offset((page - 1) * per_page).limit(per_page).all()
+        return products, total
+
+    ranked = search_index.search(text)
+    if not ranked:
+        return [], 0
+
+    # Apply the remaining filters (active, category, featured) to the matches
+    allowed = {
+        row.id for row in
+        query.filter(Product.id.in_(ranked)).with_entities(Product.id)
+    }
+    ranked = [product_id for product_id in ranked if product_id in allowed]
+
+    page_ids = ranked[(page - 1) * per_page:page * per_page]
+    by_id = {p.id: p for p in query.filter(Product.id.in_(page_ids))} if page_ids else {}
+    return [by_id[product_id] for product_id in page_ids if product_id in by_id], len(ranked)
@@ -1,14 +1,28 @@
 """
 Seed script to populate the database with initial data
 Run this script after creating the database
+
+With --synthetic it also generates a large, reproducible dataset for load
+testing on top of the hand-written seed data:
+
+    python seed.py --synthetic --users 100000 --products 100000 --orders 10000000
+
+The same --seed and --until always produce the same rows.
 """
 
+import argparse
+import os
+import random
+import time
+from datetime import datetime, date, timedelta
+from sqlalchemy import insert, func
 from app import create_app
-from models import db, Product, Category, User
+from models import db, Product, Category, User, Address, Order, OrderItem, StoreStats
+import analytics
 
-def seed_database():
+def seed_database(config_name='development'):
     """Seed the database with initial data"""
-    app = create_app()
+    app = create_app(config_name)
 
     with app.app_context():
         # Clear existing data
@@ -202,5 +216,304 @@ def seed_database():
         print(f"Created {len(categories)} categories")
 
 
+# ============ SYNTHETIC DATA ============
+
+CATALOG = {
+    'Pods': {
+        'brands': ['RELX', 'JUUL', 'Vaporesso', 'SMOK', 'Uwell', 'GeekVape', 'Voopoo', 'Aspire'],
+        'models': ['Infinity', 'Nord', 'XROS', 'Caliburn', 'Wenax', 'Drag', 'Flexus', 'Luxe'],
+        'price': (899.0, 2999.0)
+    },
+    'Liquids': {
+        'brands': ['Naked', 'Cloud Nurdz', 'Dinner Lady', 'Pachamama', 'Coastal Clouds', 'Bad Drip'],
+        'models': ['Mango Ice', 'Strawberry Mint', 'Blue Razz', 'Classic Tobacco', 'Lemon Tart',
+                   'Watermelon', 'Grape Frost', 'Peach Tea', 'Vanilla Custard', 'Cool Mint'],
+        'price': (399.0, 999.0)
+    },
+    'Accessories': {
+        'brands': ['PrimeVape', 'Uwell', 'SMOK', 'Vaporesso'],
+        'models': ['Coil Pack', 'Replacement Pods', 'USB-C Cable', 'Carrying Case', 'Lanyard', 'Drip Tip'],
+        'price': (149.0, 799.0)
+    }
+}
+
+CATEGORY_WEIGHTS = [('Pods', 0.35), ('Liquids', 0.45), ('Accessories', 0.20)]
+
+# Share of orders with 1, 2, 3, ... distinct products
+ITEMS_PER_ORDER = [(1, 0.50), (2, 0.25), (3, 0.13), (4, 0.07), (5, 0.05)]
+
+QUANTITY_WEIGHTS = [(1, 0.70), (2, 0.20), (3, 0.07), (5, 0.03)]
+
+STATUS_WEIGHTS = [
+    ('delivered', 0.60), ('shipped', 0.10), ('processing', 0.08),
+    ('pending', 0.15), ('cancelled', 0.07)
+]
+
+CITIES = [
+    ('Manila', 'Metro Manila'), ('Quezon City', 'Metro Manila'), ('Cebu City', 'Cebu'),
+    ('Davao City', 'Davao del Sur'), ('Makati', 'Metro Manila'), ('Baguio', 'Benguet'),
+    ('Iloilo City', 'Iloilo'), ('Pasig', 'Metro Manila')
+]
+
+FIRST_NAMES = ['Juan', 'Maria', 'Jose', 'Ana', 'Mark', 'Grace', 'Paolo', 'Andrea', 'Miguel', 'Camille']
+LAST_NAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Ramos', 'Lim', 'Tan']
+
+SYNTHETIC_PASSWORD = 'password123'
+HISTORY_DAYS = 365
+
+
+def _split(weighted):
+    values, weights = zip(*weighted)
+    return list(values), list(weights)
+
+
+def _insert_batches(model, rows, batch_size, label, total):
+    """Insert rows from an iterator with one executemany per batch"""
+    started = time.monotonic()
+    batch = []
+    done = 0
+
+    def flush():
+        nonlocal done
+        db.session.execute(insert(model), batch)
+        db.session.commit()
+        done += len(batch)
+        batch.clear()
+        rate = done / (time.monotonic() - started)
+        print(f"   … {label}: {done:,}/{total:,} ({rate:,.0f} rows/s)", end='\r', flush=True)
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    print(f"✅ {label}: {done:,} rows in {time.monotonic() - started:.1f}s" + ' ' * 20)
+
+
+def _reset_sequences():
+    """Move Postgres id sequences past the explicitly inserted ids"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for model in (User, Address, Product, Order, OrderItem):
+        table = model.__tablename__
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 1), "
+            f"(SELECT MAX(id) FROM {table}) IS NOT NULL)"
+        ))
+    db.session.commit()
+
+
+def generate_dataset(users, products, orders, seed=42, until=None, batch_size=10000,
+                     config_name=None):
+    """Add a synthetic catalog, customer base and order history to the seeded database
+
+    Ids are assigned here so order items can reference their orders without
+    reading anything back, which keeps every batch to a single executemany.
+    Orders are spread over the HISTORY_DAYS days before `until` (default
+    today), with Zipf-like product popularity and a skewed set of repeat
+    customers.
+    """
+    rng = random.Random(seed)
+    until = datetime.combine(until or date.today(), datetime.min.time())
+    since = until - timedelta(days=HISTORY_DAYS)
+    span = (until - since).total_seconds()
+
+    app = create_app(config_name or os.getenv('FLASK_ENV', 'development'))
+
+    with app.app_context():
+        first_user = (db.session.query(func.max(User.id)).scalar() or 0) + 1
+        first_address = (db.session.query(func.max(Address.id)).scalar() or 0) + 1
+        first_product = (db.session.query(func.max(Product.id)).scalar() or 0) + 1
+        first_order = (db.session.query(func.max(Order.id)).scalar() or 0) + 1
+        first_item = (db.session.query(func.max(OrderItem.id)).scalar() or 0) + 1
+
+        print(f"🧪 Generating {users:,} users, {products:,} products and {orders:,} orders (seed {seed})...")
+
+        # One bcrypt hash shared by every synthetic user
+        template = User()
+        template.set_password(SYNTHETIC_PASSWORD)
+        password_hash = template.password_hash
+
+        def user_rows():
+            for n in range(users):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                yield {
+                    'id': first_user + n,
+                    'email': f'user{n}@example.com',
+                    'username': f'user{n}',
+                    'password_hash': password_hash,
+                    'first_name': first,
+                    'last_name': last,
+                    'phone': f'09{rng.randrange(10**9):09d}',
+                    'is_admin': False,
+                    'token_version': 0,
+                    'created_at': since + timedelta(seconds=span * n / max(users, 1)),
+                    'updated_at': since + timedelta(seconds=span * n / max(users, 1))
+                }
+
+        def address_rows():
+            for n in range(users):
+                city, state = rng.choice(CITIES)
+                yield {
+                    'id': first_address + n,
+                    'user_id': first_user + n,
+                    'street': f'{rng.randint(1, 9999)} {rng.choice(LAST_NAMES)} St.',
+                    'city': city,
+                    'state': state,
+                    'zip_code': f'{rng.randint(1000, 9999)}',
+                    'country': 'Philippines',
+                    'is_default': True,
+                    'created_at': since + timedelta(seconds=span * n / max(users, 1))
+                }
+
+        categories, category_weights = _split(CATEGORY_WEIGHTS)
+        prices = []
+        product_categories = []
+
+        def product_rows():
+            for n in range(products):
+                category = rng.choices(categories, category_weights)[0]
+                spec = CATALOG[category]
+                low, high = spec['price']
+                price = round(rng.uniform(low, high) / 10) * 10 - 1.0
+                prices.append(price)
+                product_categories.append(category)
+                name = f"{rng.choice(spec['brands'])} {rng.choice(spec['models'])} #{n + 1}"
+                yield {
+                    'id': first_product + n,
+                    'name': name,
+                    'category': category,
+                    'price': price,
+                    'description': f'{name} from our synthetic {category.lower()} catalog.',
+                    'image': '',
+                    'stock': rng.randint(0, 500),
+                    'featured': rng.random() < 0.05,
+                    'is_active': rng.random() < 0.95,
+                    'created_at': since + timedelta(seconds=span * n / max(products, 1)),
+                    'updated_at': since + timedelta(seconds=span * n / max(products, 1))
+                }
+
+        _insert_batches(User, user_rows(), batch_size, 'users', users)
+        _insert_batches(Address, address_rows(), batch_size, 'addresses', users)
+        _insert_batches(Product, product_rows(), batch_size, 'products', products)
+
+        if orders and users and products:
+            # Zipf-like popularity: a few products and customers dominate
+            product_weights = [1 / (rank + 1) ** 1.1 for rank in range(products)]
+            product_order = list(range(products))
+            rng.shuffle(product_order)
+            product_cum = []
+            total = 0.0
+            for weight in product_weights:
+                total += weight
+                product_cum.append(total)
+            user_cum = []
+            total = 0.0
+            for rank in range(users):
+                total += 1 / (rank + 1) ** 0.8
+                user_cum.append(total)
+
+            sizes, size_weights = _split(ITEMS_PER_ORDER)
+            quantities, quantity_weights = _split(QUANTITY_WEIGHTS)
+            statuses, status_weights = _split(STATUS_WEIGHTS)
+            items = []
+
+            def order_rows():
+                item_id = first_item
+                for n in range(orders):
+                    order_id = first_order + n
+                    created_at = since + timedelta(seconds=span * (n + rng.random()) / orders)
+                    size = rng.choices(sizes, size_weights)[0]
+                    picks = {
+                        product_order[rank] for rank in
+                        rng.choices(range(products), cum_weights=product_cum, k=size)
+                    }
+                    subtotal = 0.0
+                    for index in sorted(picks):
+                        quantity = rng.choices(quantities, quantity_weights)[0]
+                        subtotal += prices[index] * quantity
+                        items.append({
+                            'id': item_id,
+                            'order_id': order_id,
+                            'product_id': first_product + index,
+                            'quantity': quantity,
+                            'price': prices[index]
+                        })
+                        item_id += 1
+
+                    city, state = rng.choice(CITIES)
+                    shipping_cost = 0.0 if subtotal >= 2000 else 5.99
+                    yield {
+                        'id': order_id,
+                        'user_id': first_user + rng.choices(range(users), cum_weights=user_cum)[0],
+                        'order_number': f'ORD-{created_at:%Y%m%d}-SYN{n:08d}',
+                        'status': rng.choices(statuses, status_weights)[0],
+                        'subtotal': subtotal,
+                        'shipping_cost': shipping_cost,
+                        'total': subtotal + shipping_cost,
+                        'shipping_street': f'{rng.randint(1, 9999)} {rng.choice(LAST_NAMES)} St.',
+                        'shipping_city': city,
+                        'shipping_state': state,
+                        'shipping_zip': f'{rng.randint(1000, 9999)}',
+                        'shipping_country': 'Philippines',
+                        'created_at': created_at,
+                        'updated_at': created_at
+                    }
+
+            started = time.monotonic()
+            order_batch = []
+            written = 0
+            item_count = 0
+
+            def flush_orders():
+                # Each batch of orders is committed together with its items
+                nonlocal written, item_count
+                db.session.execute(insert(Order), order_batch)
+                db.session.execute(insert(OrderItem), items)
+                db.session.commit()
+                written += len(order_batch)
+                item_count += len(items)
+                order_batch.clear()
+                items.clear()
+                rate = written / (time.monotonic() - started)
+                print(f"   … orders: {written:,}/{orders:,} ({rate:,.0f} orders/s)", end='\r', flush=True)
+
+            for row in order_rows():
+                order_batch.append(row)
+                if len(order_batch) >= batch_size:
+                    flush_orders()
+            if order_batch:
+                flush_orders()
+            print(f"✅ orders: {written:,} orders and {item_count:,} items "
+                  f"in {time.monotonic() - started:.1f}s" + ' ' * 20)
+
+        _reset_sequences()
+
+        print("📊 Rebuilding dashboard stats and sales rollups...")
+        StoreStats.reconcile()
+        hourly, daily, category_daily = analytics.rebuild_rollups()
+        print(f"✅ Stats rebuilt, {hourly:,} hourly, {daily:,} product-day and "
+              f"{category_daily:,} category-day rollup rows")
+
+        print(f"\n🎉 Synthetic dataset ready. Every synthetic user's password is {SYNTHETIC_PASSWORD}")
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Seed the PrimeVape database')
+    parser.add_argument('--synthetic', action='store_true', help='also generate a load-test dataset')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--until', type=date.fromisoformat, help='last day of order history (YYYY-MM-DD)')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+
     seed_database()
+
+    if args.synthetic:
+        print()
+        generate_dataset(args.users, args.products, args.orders,
+                         seed=args.seed, until=args.until, batch_size=args.batch_size)
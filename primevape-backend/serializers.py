@@ -0,0 +1,184 @@
+"""
+Column-projected serializers for list endpoints
+
+Hydrating ORM objects for a listing page costs an identity-map entry,
+attribute instrumentation and relationship state per row, only to read a few
+scalars back out in to_dict(). A RowSerializer instead selects just its
+columns with with_entities() and builds each dict straight from the row
+tuple. The output matches the model's to_dict(), so an endpoint can switch
+between the two freely.
+
+Listings accept a `fields` query parameter (comma separated, e.g.
+fields=id,name,price,image) which narrows both the SELECT and the output;
+`id` is always returned. Order listings embed their items by default; once
+fields= or include= is given they do so only for include=items (or `items`
+in fields).
+
+Filters should be applied to the model query first and select() called last,
+since filter_by() needs the model entity.
+"""
+
+from flask import request
+from models import db, Product, User, Order, OrderItem, InventoryAdjustment
+
+
+class InvalidFields(ValueError):
+    """Raised when fields= names something the listing doesn't have"""
+
+
+def fields_param():
+    """Field names from ?fields=, or None when the parameter is absent"""
+    raw = request.args.get('fields')
+    if raw is None:
+        return None
+    return [name.strip() for name in raw.split(',') if name.strip()]
+
+
+def include_param(name):
+    """True if ?include= lists name"""
+    return name in (part.strip() for part in request.args.get('include', '').split(','))
+
+
+class RowSerializer:
+    """Select a fixed set of columns and turn the rows into dicts"""
+
+    # Selected even when not requested; pagination orders and pages on them
+    SORT_COLUMNS = ('id', 'created_at')
+
+    def __init__(self, *columns, shape=None, groups=None):
+        self.columns = columns
+        self.names = tuple(column.key for column in columns)
+        self.shape = shape  # Optional hook to nest or derive fields
+        self.groups = groups or {}  # Output field -> the columns shape() builds it from
+        self.hidden = ()
+
+    @property
+    def fields(self):
+        """Output field names, in column order"""
+        grouped = {name: field for field, names in self.groups.items() for name in names}
+        fields = []
+        for name in self.names:
+            field = grouped.get(name, name)
+            if field not in fields:
+                fields.append(field)
+        return fields
+
+    def only(self, fields):
+        """Serializer limited to fields (plus id); None means all fields"""
+        if fields is None:
+            return self
+
+        unknown = [field for field in fields if field not in self.fields]
+        if unknown:
+            raise InvalidFields(
+                f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(self.fields)}"
+            )
+
+        wanted = set(fields) | {'id'}
+        keep = set()
+        for field in wanted | set(self.SORT_COLUMNS):
+            keep.update(self.groups.get(field, (field,)))
+
+        narrowed = RowSerializer(
+            *[column for column in self.columns if column.key in keep],
+            shape=self.shape, groups=self.groups
+        )
+        narrowed.hidden = tuple(name for name in self.SORT_COLUMNS if name not in wanted)
+        return narrowed
+
+    def select(self, query):
+        """Narrow query to this serializer's columns"""
+        return query.with_entities(*self.columns)
+
+    def dump(self, row):
+        """Build the dict for one row"""
+        data = dict(zip(self.names, row))
+        if self.shape:
+            data = self.shape(data)
+        for name in self.hidden:
+            del data[name]
+        return data
+
+    def dump_all(self, rows):
+        """Build dicts for a sequence of rows"""
+        return [self.dump(row) for row in rows]
+
+
+SHIPPING_COLUMNS = (
+    'shipping_street', 'shipping_city', 'shipping_state', 'shipping_zip', 'shipping_country'
+)
+
+
+def _nest_shipping_address(data):
+    if 'shipping_street' in data:
+        data['shipping_address'] = {
+            'street': data.pop('shipping_street'),
+            'city': data.pop('shipping_city'),
+            'state': data.pop('shipping_state'),
+            'zip_code': data.pop('shipping_zip'),
+            'country': data.pop('shipping_country')
+        }
+    return data
+
+
+product_rows = RowSerializer(
+    Product.id, Product.name, Product.category, Product.price, Product.description,
+    Product.image, Product.stock, Product.featured, Product.is_active, Product.created_at
+)
+
+user_rows = RowSerializer(
+    User.id, User.email, User.username, User.first_name, User.last_name,
+    User.phone, User.is_admin, User.created_at
+)
+
+order_rows = RowSerializer(
+    Order.id, Order.user_id, Order.order_number, Order.status, Order.subtotal,
+    Order.shipping_cost, Order.total, Order.shipping_street, Order.shipping_city,
+    Order.shipping_state, Order.shipping_zip, Order.shipping_country,
+    Order.created_at, Order.updated_at,
+    shape=_nest_shipping_address, groups={'shipping_address': SHIPPING_COLUMNS}
+)
+
+inventory_rows = RowSerializer(
+    InventoryAdjustment.id, InventoryAdjustment.product_id, InventoryAdjustment.delta,
+    InventoryAdjustment.stock_after, InventoryAdjustment.reason, InventoryAdjustment.reference,
+    InventoryAdjustment.user_id, InventoryAdjustment.created_at
+)
+
+
+def order_listing():
+    """(serializer, embed items) for an order listing request"""
+    fields = fields_param()
+    if fields is None:
+        with_items = include_param('items') or 'include' not in request.args
+    else:
+        with_items = include_param('items') or 'items' in fields
+        fields = [field for field in fields if field != 'items']
+    return order_rows.only(fields), with_items
+
+
+def attach_items(orders):
+    """Add each serialized order's items, loaded in one query with product names"""
+    items = {order['id']: [] for order in orders}
+    if items:
+        rows = db.session.query(
+            OrderItem.id, OrderItem.order_id, OrderItem.product_id, Product.name,
+            OrderItem.quantity, OrderItem.price
+        ).outerjoin(Product, Product.id == OrderItem.product_id)\
+            .filter(OrderItem.order_id.in_(items))\
+            .order_by(OrderItem.order_id, OrderItem.id)
+
+        for item_id, order_id, product_id, product_name, quantity, price in rows:
+            items[order_id].append({
+                'id': item_id,
+                'order_id': order_id,
+                'product_id': product_id,
+                'product_name': product_name,
+                'quantity': quantity,
+                'price': price,
+                'subtotal': quantity * price
+            })
+
+    for order in orders:
+        order['items'] = items[order['id']]
+    return orders
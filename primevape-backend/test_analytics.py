@@ -0,0 +1,81 @@
+"""
+/api/admin/analytics reports from rollups kept in step with order writes,
+and rebuild_rollups() reproduces them from the orders themselves
+"""
+
+import pytest
+from analytics import rebuild_rollups
+from conftest import add_products
+
+
+def report(client, admin):
+    response = client.get('/api/admin/analytics?interval=month', headers=admin[1])
+    assert response.status_code == 200
+    return response.get_json()
+
+
+@pytest.fixture
+def sales(app, client, customer):
+    # Products alternate Liquids (even index) and Pods (odd index), prices 10 + index
+    product_ids = add_products(app, 4)
+    orders = [
+        [(product_ids[0], 1), (product_ids[2], 2)],  # two Liquids lines: 10 + 24
+        [(product_ids[1], 1)],  # Pods: 11
+        [(product_ids[0], 1), (product_ids[1], 1)],  # one of each: 10 + 11
+    ]
+    ids = []
+    for lines in orders:
+        response = client.post('/api/orders', headers=customer[1], json={
+            'items': [{'product_id': product_id, 'quantity': quantity} for product_id, quantity in lines]
+        })
+        assert response.status_code == 201
+        ids.append(response.get_json()['order']['id'])
+    return product_ids, ids
+
+
+def test_category_counts_each_order_once(client, admin, sales):
+    by_category = {row['category']: row for row in report(client, admin)['by_category']}
+
+    assert by_category['Liquids']['orders'] == 2
+    assert by_category['Liquids']['units'] == 4
+    assert by_category['Liquids']['revenue'] == pytest.approx(44.0)
+    assert by_category['Liquids']['average_order_value'] == pytest.approx(22.0)
+    assert by_category['Pods']['orders'] == 2
+    assert by_category['Pods']['revenue'] == pytest.approx(22.0)
+
+
+def test_totals_and_products(client, admin, sales):
+    product_ids, _ = sales
+    body = report(client, admin)
+
+    assert body['totals']['orders'] == 3
+    assert body['totals']['units'] == 6
+    by_product = {row['product_id']: row for row in body['by_product']}
+    assert by_product[product_ids[0]]['orders'] == 2
+    assert by_product[product_ids[2]]['units'] == 2
+
+
+def test_cancelling_removes_the_order(client, customer, admin, sales):
+    _, order_ids = sales
+    assert client.post(f'/api/orders/{order_ids[0]}/cancel', headers=customer[1]).status_code == 200
+
+    body = report(client, admin)
+    assert body['totals']['orders'] == 2
+    by_category = {row['category']: row for row in body['by_category']}
+    assert by_category['Liquids']['orders'] == 1
+
+
+def test_rebuild_matches_incremental_rollups(app, client, customer, admin, sales):
+    _, order_ids = sales
+    client.post(f'/api/orders/{order_ids[1]}/cancel', headers=customer[1])
+    incremental = report(client, admin)
+
+    with app.app_context():
+        assert rebuild_rollups()[1:] == (3, 2)
+
+    assert report(client, admin) == incremental
+
+
+def test_invalid_interval(client, admin):
+    response = client.get('/api/admin/analytics?interval=year', headers=admin[1])
+    assert response.status_code == 400
@@ -0,0 +1,47 @@
+"""
+Admin access comes from JWT claims, and demoting or deleting a user revokes
+their tokens once the change commits
+"""
+
+from auth_utils import revoke_tokens, token_versions
+from conftest import add_user, auth_header
+from models import db, User
+
+
+def test_admin_routes_check_the_claim(client, customer, admin):
+    assert client.get('/api/admin/stats', headers=customer[1]).status_code == 403
+    assert client.get('/api/admin/stats', headers=admin[1]).status_code == 200
+
+
+def test_demoting_an_admin_revokes_their_tokens(app, client, admin):
+    other_id = add_user(app, 'other@example.com', is_admin=True)
+    other = auth_header(client, 'other@example.com')
+    assert client.get('/api/admin/stats', headers=other).status_code == 200
+
+    response = client.put(f'/api/admin/users/{other_id}', headers=admin[1], json={'is_admin': False})
+    assert response.status_code == 200
+
+    revoked = client.get('/api/auth/me', headers=other)
+    assert revoked.status_code == 401
+    assert revoked.get_json()['error'] == 'Token has been revoked'
+
+    # A fresh login carries the new claims
+    assert client.get('/api/admin/stats', headers=auth_header(client, 'other@example.com')).status_code == 403
+
+
+def test_deleting_a_user_revokes_their_tokens(client, customer, admin):
+    user_id, headers = customer
+    assert client.delete(f'/api/admin/users/{user_id}', headers=admin[1]).status_code == 200
+    assert client.get('/api/auth/me', headers=headers).status_code == 401
+
+
+def test_rolled_back_revocation_keeps_tokens_valid(app, client, admin):
+    user_id, headers = admin
+    assert client.get('/api/admin/stats', headers=headers).status_code == 200
+
+    with app.app_context():
+        revoke_tokens(db.session.get(User, user_id))
+        db.session.rollback()
+        assert token_versions.get(user_id) == 0
+
+    assert client.get('/api/admin/stats', headers=headers).status_code == 200
@@ -0,0 +1,57 @@
+"""
+Batch lookup returns the requested products keyed by id, in request order,
+with missing or inactive ids listed separately, from a single query
+"""
+
+import pytest
+from conftest import add_products, query_count
+from models import db, Product
+
+
+@pytest.fixture
+def product_ids(app):
+    ids = add_products(app, 4)
+    with app.app_context():
+        db.session.get(Product, ids[3]).is_active = False
+        db.session.commit()
+    return ids
+
+
+def test_get_by_query_string(client, product_ids):
+    first, second, third, inactive = product_ids
+    response = client.get(f'/api/products/batch?ids={third},{first},999,{inactive},{first}')
+    assert response.status_code == 200
+    body = response.get_json()
+
+    assert list(body['products']) == [str(third), str(first)]
+    assert body['products'][str(first)]['name'] == 'Product 0'
+    assert body['missing'] == [999, inactive]
+    assert query_count(response) == 1
+
+
+def test_post_body(client, product_ids):
+    first, second = product_ids[:2]
+    response = client.post('/api/products/batch', json={'ids': [second, str(first)]})
+    assert response.status_code == 200
+    assert list(response.get_json()['products']) == [str(second), str(first)]
+
+
+def test_limit(app, client):
+    add_products(app, 1)
+    assert client.post('/api/products/batch', json={'ids': list(range(1, 501))}).status_code == 200
+
+    response = client.post('/api/products/batch', json={'ids': list(range(1, 502))})
+    assert response.status_code == 400
+    assert 'At most 500' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('method, kwargs', [
+    ('get', {'query_string': {'ids': ''}}),
+    ('get', {'query_string': {'ids': '1,two'}}),
+    ('post', {'json': {'ids': []}}),
+    ('post', {'json': {'ids': '1,2'}}),
+    ('post', {'json': [1, 2]}),
+    ('post', {'json': {'ids': [1, None]}}),
+])
+def test_bad_requests(client, method, kwargs):
+    assert getattr(client, method)('/api/products/batch', **kwargs).status_code == 400
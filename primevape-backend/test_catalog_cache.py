@@ -0,0 +1,85 @@
+"""
+Catalog responses are cached per worker and dropped whenever stock or
+product data changes
+"""
+
+import time
+from cache import TTLCache, CatalogCache
+from conftest import add_products, query_count
+
+
+def stock_listed(client, product_id):
+    products = client.get('/api/products').get_json()['products']
+    return next(product['stock'] for product in products if product['id'] == product_id)
+
+
+def test_orders_and_cancels_refresh_cached_stock(app, client, customer):
+    _, headers = customer
+    product_id, = add_products(app, 1, stock=5)
+    detail = client.get(f'/api/products/{product_id}')
+    assert stock_listed(client, product_id) == 5
+
+    response = client.post('/api/orders', headers=headers, json={
+        'items': [{'product_id': product_id, 'quantity': 5}]
+    })
+    assert response.status_code == 201
+
+    # Sold out shows straight away, and the old ETag no longer matches
+    assert stock_listed(client, product_id) == 0
+    fresh = client.get(f'/api/products/{product_id}', headers={'If-None-Match': detail.headers['ETag']})
+    assert fresh.status_code == 200
+    assert fresh.get_json()['stock'] == 0
+
+    order_id = response.get_json()['order']['id']
+    assert client.post(f'/api/orders/{order_id}/cancel', headers=headers).status_code == 200
+    assert stock_listed(client, product_id) == 5
+
+
+def test_repeat_listing_is_served_from_cache(app, client):
+    add_products(app, 5)
+    first = client.get('/api/products?category=Pods')
+    second = client.get('/api/products?category=Pods')
+
+    assert query_count(first) > 0
+    assert query_count(second) == 0
+    assert second.get_json() == first.get_json()
+    # Other parameters are cached separately
+    assert query_count(client.get('/api/products?category=Liquids')) > 0
+
+
+def test_product_writes_invalidate(app, client, admin):
+    product_id, = add_products(app, 1)
+    client.get('/api/products')
+
+    response = client.put(f'/api/products/{product_id}', headers=admin[1], json={'name': 'Renamed'})
+    assert response.status_code == 200
+    assert client.get('/api/products').get_json()['products'][0]['name'] == 'Renamed'
+
+    client.post('/api/products', headers=admin[1], json={'name': 'New', 'category': 'Pods', 'price': 5})
+    assert client.get('/api/products').get_json()['total'] == 2
+
+    client.delete(f'/api/products/{product_id}', headers=admin[1])
+    assert client.get('/api/products').get_json()['total'] == 1
+
+
+def test_ttl_cache_expires_and_evicts(monkeypatch):
+    cache = TTLCache(ttl=10, max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)  # evicts b, the least recently used
+
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+
+    later = time.monotonic() + 11
+    monkeypatch.setattr(time, 'monotonic', lambda: later)
+    assert cache.get('a') is None
+
+
+def test_store_skips_values_read_before_a_write():
+    cache = CatalogCache()
+    version = cache.version
+    cache.invalidate()
+    cache.store('key', 'stale', version)
+
+    assert cache.get('key') is None
@@ -0,0 +1,73 @@
+"""
+Large responses are compressed with the client's preferred encoding, small
+and streamed ones are not, and cached catalog pages are compressed once
+"""
+
+import gzip
+import json
+from types import SimpleNamespace
+import brotli
+import pytest
+import compression
+from conftest import add_products
+
+PRODUCTS = 20  # Enough for a listing well over COMPRESS_MIN_SIZE
+
+
+@pytest.fixture
+def listing(app):
+    add_products(app, PRODUCTS)
+    return '/api/products'
+
+
+def test_brotli_preferred(client, listing):
+    plain = client.get(listing)
+    assert 'Content-Encoding' not in plain.headers
+    assert len(plain.get_data()) >= 1024
+
+    response = client.get(listing, headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['ETag'] == plain.headers['ETag'][:-1] + '-br"'
+    assert brotli.decompress(response.get_data()) == plain.get_data()
+
+
+def test_client_preference_wins(client, listing):
+    response = client.get(listing, headers={'Accept-Encoding': 'br;q=0.5, gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(json.loads(gzip.decompress(response.get_data()))['products']) == PRODUCTS
+
+    response = client.get(listing, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_gzip_without_brotli(client, listing, monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    response = client.get(listing, headers={'Accept-Encoding': 'br, gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+
+def test_small_and_streamed_bodies_are_left_alone(app, client, admin):
+    product_id, = add_products(app, 1)
+
+    response = client.get(f'/api/products/{product_id}', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+    response = client.get('/api/admin/export/users', headers={**admin[1], 'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_cached_pages_are_compressed_once(client, listing, monkeypatch):
+    calls = []
+
+    def compress(data, **kwargs):
+        calls.append(len(data))
+        return gzip.compress(data, **kwargs)
+
+    monkeypatch.setattr(compression, 'gzip', SimpleNamespace(compress=compress))
+
+    bodies = {client.get(listing, headers={'Accept-Encoding': 'gzip'}).get_data() for _ in range(3)}
+    assert len(bodies) == 1
+    assert len(calls) == 1
+
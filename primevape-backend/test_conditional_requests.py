@@ -0,0 +1,92 @@
+"""
+Catalog endpoints send ETag/Last-Modified and answer revalidations with 304
+"""
+
+import pytest
+from conftest import add_products, query_count
+
+
+@pytest.fixture
+def product_ids(app):
+    return add_products(app, 30)
+
+
+@pytest.mark.parametrize('path', [
+    '/api/products',
+    '/api/products?category=Pods&fields=id,name',
+    '/api/products/{product_id}',
+    '/api/products/categories',
+])
+def test_if_none_match_returns_304(client, product_ids, path):
+    path = path.format(product_id=product_ids[0])
+    first = client.get(path)
+    assert first.status_code == 200
+    assert first.headers['ETag'].startswith('"')
+    assert 'public' in first.headers['Cache-Control']
+
+    again = client.get(path, headers={'If-None-Match': first.headers['ETag']})
+
+    assert again.status_code == 304
+    assert again.get_data() == b''
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert again.headers['Cache-Control'] == first.headers['Cache-Control']
+    # A warm worker revalidates from the catalog cache
+    assert query_count(again) == 0
+
+
+def test_representations_have_distinct_etags(client, product_ids):
+    etags = {
+        client.get(path).headers['ETag']
+        for path in (
+            '/api/products', '/api/products?page=2&per_page=5', '/api/products?fields=id',
+            f'/api/products/{product_ids[0]}', f'/api/products/{product_ids[1]}'
+        )
+    }
+    assert len(etags) == 5
+
+
+def test_if_modified_since(client, product_ids):
+    first = client.get('/api/products')
+    last_modified = first.headers['Last-Modified']
+
+    assert client.get('/api/products', headers={'If-Modified-Since': last_modified}).status_code == 304
+    earlier = client.get('/api/products', headers={'If-Modified-Since': 'Sat, 01 Jan 2000 00:00:00 GMT'})
+    assert earlier.status_code == 200
+
+    # If-None-Match takes precedence over a matching date
+    stale = client.get('/api/products', headers={
+        'If-None-Match': '"stale"', 'If-Modified-Since': last_modified
+    })
+    assert stale.status_code == 200
+
+
+def test_product_write_changes_etag(client, product_ids, admin):
+    listing = client.get('/api/products')
+    detail = client.get(f'/api/products/{product_ids[0]}')
+
+    response = client.put(f'/api/products/{product_ids[0]}', headers=admin[1], json={'price': 99.0})
+    assert response.status_code == 200
+
+    for path, old in (('/api/products', listing), (f'/api/products/{product_ids[0]}', detail)):
+        fresh = client.get(path, headers={'If-None-Match': old.headers['ETag']})
+        assert fresh.status_code == 200
+        assert fresh.headers['ETag'] != old.headers['ETag']
+
+
+def test_compressed_etag_carries_encoding(client, product_ids):
+    first = client.get('/api/products', headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['ETag'].endswith('-gzip"')
+
+    again = client.get('/api/products', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']
+    })
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert 'Accept-Encoding' in again.headers['Vary']
+
+
+def test_missing_product_is_still_404(client, product_ids):
+    response = client.get('/api/products/999999')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
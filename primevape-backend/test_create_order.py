@@ -0,0 +1,87 @@
+"""
+POST /api/orders validates its lines, loads the cart in one query and
+inserts the items in one batch
+"""
+
+import pytest
+from conftest import add_products, query_count
+
+
+def order(client, headers, items):
+    return client.post('/api/orders', headers=headers, json={'items': items})
+
+
+def test_creates_order_with_totals(app, client, customer):
+    _, headers = customer
+    first, second = add_products(app, 2)
+
+    response = order(client, headers, [
+        {'product_id': first, 'quantity': 2},
+        {'product_id': second, 'quantity': 1}
+    ])
+
+    assert response.status_code == 201
+    body = response.get_json()['order']
+    assert body['subtotal'] == pytest.approx(2 * 10.0 + 11.0)
+    assert sorted((item['product_id'], item['quantity']) for item in body['items']) == \
+        sorted([(first, 2), (second, 1)])
+
+
+@pytest.mark.parametrize('line', [
+    {'quantity': True},
+    {'quantity': 2.9},
+    {'quantity': '2'},
+    {'quantity': None},
+    {'product_id': True},
+    {'product_id': 1.0},
+    {'product_id': None},
+])
+def test_rejects_non_integer_lines(app, client, customer, line):
+    _, headers = customer
+    product_id, = add_products(app, 1)
+
+    response = order(client, headers, [{'product_id': product_id, 'quantity': 1, **line}])
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid order items'
+
+
+@pytest.mark.parametrize('items, status', [
+    ([], 400),
+    (['not an object'], 400),
+    ([{'product_id': 999999, 'quantity': 1}], 404),
+])
+def test_rejects_bad_carts(client, customer, items, status):
+    assert order(client, customer[1], items).status_code == status
+
+
+def test_zero_quantity_and_short_stock(app, client, customer):
+    _, headers = customer
+    product_id, = add_products(app, 1, stock=3)
+
+    assert order(client, headers, [{'product_id': product_id, 'quantity': 0}]).status_code == 400
+    # Lines for the same product are added up before the stock check
+    response = order(client, headers, [
+        {'product_id': product_id, 'quantity': 2},
+        {'product_id': product_id, 'quantity': 2}
+    ])
+    assert response.status_code == 400
+    assert 'Insufficient stock' in response.get_json()['error']
+
+
+def test_queries_do_not_grow_with_lines(app, client, customer):
+    _, headers = customer
+    product_ids = add_products(app, 8)
+    order(client, headers, [{'product_id': product_ids[0], 'quantity': 1}])
+
+    counts = {}
+    for size in (2, 8):
+        response = order(client, headers, [
+            {'product_id': product_id, 'quantity': 1} for product_id in product_ids[:size]
+        ])
+        assert response.status_code == 201
+        counts[size] = query_count(response)
+
+    # Loading products and inserting items don't scale with the cart; only
+    # the per-product writes do (stock reservation and sales rollup row)
+    assert counts[8] - counts[2] == 2 * 6
@@ -0,0 +1,103 @@
+"""
+Admin exports stream every matching row as CSV or NDJSON, filtered by order
+date and status
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+import pytest
+import export
+from conftest import add_products
+from models import db, Order
+
+
+def place_orders(app, client, customer, count):
+    product_id, = add_products(app, 1)
+    order_ids = []
+    for _ in range(count):
+        response = client.post('/api/orders', headers=customer[1], json={
+            'items': [{'product_id': product_id, 'quantity': 2}]
+        })
+        order_ids.append(response.get_json()['order']['id'])
+    return order_ids
+
+
+def download(client, admin, name, **params):
+    response = client.get(f'/api/admin/export/{name}', headers=admin[1], query_string=params)
+    assert response.status_code == 200
+    return response
+
+
+def test_orders_csv(app, client, customer, admin):
+    order_ids = place_orders(app, client, customer, 3)
+
+    response = download(client, admin, 'orders')
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=orders.csv'
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [int(row['id']) for row in rows] == order_ids
+    assert {row['status'] for row in rows} == {'pending'}
+    assert all(row['user_id'] == str(customer[0]) for row in rows)
+    assert datetime.fromisoformat(rows[0]['created_at'])
+
+
+def test_order_items_ndjson(app, client, customer, admin):
+    order_ids = place_orders(app, client, customer, 2)
+
+    response = download(client, admin, 'order-items', format='ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['order_id'] for line in lines] == order_ids
+    assert all(line['quantity'] == 2 and line['product_name'] == 'Product 0' for line in lines)
+
+
+def test_users_export(client, customer, admin):
+    response = download(client, admin, 'users', format='ndjson')
+    emails = [json.loads(line)['email'] for line in response.get_data(as_text=True).splitlines()]
+    assert len(emails) == 2
+    assert 'password_hash' not in response.get_data(as_text=True)
+
+
+def test_date_and_status_filters(app, client, customer, admin):
+    order_ids = place_orders(app, client, customer, 3)
+    with app.app_context():
+        for order_id, day in zip(order_ids, (1, 2, 3)):
+            db.session.get(Order, order_id).created_at = datetime(2025, 3, day, 23, 30)
+        db.session.commit()
+    client.put(f'/api/admin/orders/{order_ids[1]}/status', headers=admin[1], json={'status': 'shipped'})
+
+    def exported(**params):
+        response = download(client, admin, 'orders', format='ndjson', **params)
+        return [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()]
+
+    # end is inclusive of the whole day
+    assert exported(start='2025-03-02', end='2025-03-03') == order_ids[1:]
+    assert exported(end='2025-03-01') == order_ids[:1]
+    assert exported(status='shipped') == [order_ids[1]]
+    assert exported(start='2025-03-04') == []
+
+
+def test_rows_span_flushed_batches(app, client, customer, admin, monkeypatch):
+    monkeypatch.setattr(export, 'BATCH_SIZE', 2)
+    order_ids = place_orders(app, client, customer, 5)
+
+    response = download(client, admin, 'orders')
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [int(row['id']) for row in rows] == order_ids
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/api/admin/export/payments', 404),
+    ('/api/admin/export/orders?format=xml', 400),
+    ('/api/admin/export/orders?start=2025-13-01', 400),
+])
+def test_bad_requests(client, admin, path, status):
+    assert client.get(path, headers=admin[1]).status_code == status
+
+
+def test_admin_only(client, customer):
+    assert client.get('/api/admin/export/orders', headers=customer[1]).status_code == 403
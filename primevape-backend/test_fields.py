@@ -0,0 +1,109 @@
+"""
+fields= narrows listings to the requested columns, both in the output and
+in the SELECT, and include= controls embedded order items
+"""
+
+import pytest
+from sqlalchemy import event
+from conftest import add_products
+from models import db
+
+
+@pytest.fixture
+def statements(app):
+    """SQL text of every statement run while the test is active"""
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    yield seen
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+@pytest.fixture
+def orders(app, client, customer):
+    product_id, = add_products(app, 1)
+    for _ in range(2):
+        client.post('/api/orders', headers=customer[1], json={
+            'items': [{'product_id': product_id, 'quantity': 1}],
+            'shipping_address': {'street': '1 Main St', 'city': 'Town', 'state': 'TS', 'zip_code': '1', 'country': 'US'}
+        })
+
+
+def test_product_fields_narrow_the_select(app, client, statements):
+    add_products(app, 3)
+
+    statements.clear()
+    response = client.get('/api/products?fields=name,price')
+    assert response.status_code == 200
+    products = response.get_json()['products']
+    assert [set(product) for product in products] == [{'id', 'name', 'price'}] * 3
+
+    listing = [statement for statement in statements if 'FROM products' in statement and 'products.name' in statement]
+    assert listing
+    assert all('products.description' not in statement for statement in listing)
+
+
+def test_fields_with_cursor_pagination(app, client):
+    add_products(app, 5)
+
+    response = client.get('/api/products?fields=name&cursor=&per_page=2')
+    body = response.get_json()
+    assert [set(product) for product in body['products']] == [{'id', 'name'}] * 2
+
+    following = client.get(f"/api/products?fields=name&cursor={body['next_cursor']}&per_page=2").get_json()
+    assert len(following['products']) == 2
+    assert {product['id'] for product in following['products']}.isdisjoint(
+        product['id'] for product in body['products'])
+
+
+def test_batch_lookup_fields(app, client):
+    product_ids = add_products(app, 2)
+    response = client.get(f'/api/products/batch?ids={product_ids[0]},{product_ids[1]}&fields=stock')
+    assert [set(product) for product in response.get_json()['products'].values()] == [{'id', 'stock'}] * 2
+
+
+@pytest.mark.parametrize('query, keys', [
+    ('', None),
+    ('?fields=status,total', {'id', 'status', 'total'}),
+    ('?fields=status,items', {'id', 'status', 'items'}),
+    ('?fields=status&include=items', {'id', 'status', 'items'}),
+    ('?include=', None),
+    ('?fields=shipping_address', {'id', 'shipping_address'}),
+])
+def test_order_fields_and_include(client, customer, orders, query, keys):
+    listed = client.get(f'/api/orders{query}', headers=customer[1]).get_json()['orders']
+    assert len(listed) == 2
+
+    if keys is None:
+        full = 'items' in listed[0]
+        assert full == (query == '')
+        assert 'shipping_address' in listed[0] and 'created_at' in listed[0]
+    else:
+        assert [set(order) for order in listed] == [keys] * 2
+    if 'items' in listed[0]:
+        assert [len(order['items']) for order in listed] == [1, 1]
+    if keys and 'shipping_address' in keys:
+        assert listed[0]['shipping_address']['city'] == 'Town'
+
+
+def test_admin_order_listing_fields(client, admin, orders):
+    listed = client.get('/api/admin/orders?fields=order_number', headers=admin[1]).get_json()['orders']
+    assert [set(order) for order in listed] == [{'id', 'order_number'}] * 2
+
+
+@pytest.mark.parametrize('path', [
+    '/api/products?fields=name,secret',
+    '/api/products/batch?ids=1&fields=password_hash',
+    '/api/orders?fields=user',
+    '/api/admin/orders?fields=nope',
+])
+def test_unknown_fields(client, customer, admin, path):
+    headers = admin[1] if '/admin/' in path else customer[1]
+    response = client.get(path, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Unknown fields')
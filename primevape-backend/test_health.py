@@ -0,0 +1,28 @@
+"""
+/health reports database status without leaking connection details
+"""
+
+from models import db
+
+
+def test_healthy(client):
+    response = client.get('/health')
+
+    assert response.status_code == 200
+    assert response.get_json()['database']['status'] == 'ok'
+
+
+def test_database_error_is_not_exposed(app, client, monkeypatch):
+    with app.app_context():
+        engine = db.engine
+
+    def refuse():
+        raise RuntimeError('password authentication failed for user "neondb_owner" at db.example.com')
+
+    monkeypatch.setattr(type(engine), 'connect', lambda self: refuse())
+    response = client.get('/health')
+
+    assert response.status_code == 503
+    body = response.get_json()
+    assert body['database']['status'] == 'error'
+    assert 'neondb_owner' not in response.get_data(as_text=True)
@@ -0,0 +1,105 @@
+"""
+Checkout retries with the same Idempotency-Key replay the first response
+instead of placing a second order
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytest
+import idempotency
+from conftest import add_products, add_user, auth_header, query_count
+from models import db, Order, Product, IdempotencyKey
+
+
+@pytest.fixture
+def product_id(app):
+    product_id, = add_products(app, 1, stock=5)
+    return product_id
+
+
+def checkout(client, headers, product_id, key, quantity=1):
+    return client.post('/api/orders', headers={**headers, 'Idempotency-Key': key}, json={
+        'items': [{'product_id': product_id, 'quantity': quantity}]
+    })
+
+
+def counts(app, product_id):
+    with app.app_context():
+        return Order.query.count(), db.session.get(Product, product_id).stock
+
+
+def test_retry_replays_first_response(app, client, customer, product_id):
+    first = checkout(client, customer[1], product_id, 'checkout-1')
+    assert first.status_code == 201
+    assert 'Idempotent-Replayed' not in first.headers
+
+    retry = checkout(client, customer[1], product_id, 'checkout-1')
+    assert retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json() == first.get_json()
+    assert query_count(retry) <= 4  # No product reads or stock updates
+    assert counts(app, product_id) == (1, 4)
+
+
+def test_different_body_is_rejected(app, client, customer, product_id):
+    checkout(client, customer[1], product_id, 'checkout-1')
+
+    response = checkout(client, customer[1], product_id, 'checkout-1', quantity=2)
+    assert response.status_code == 422
+    assert counts(app, product_id) == (1, 4)
+
+
+def test_keys_are_scoped_to_the_user(app, client, customer, product_id):
+    add_user(app, 'other@example.com')
+    other = auth_header(client, 'other@example.com')
+    checkout(client, customer[1], product_id, 'checkout-1')
+
+    response = checkout(client, other, product_id, 'checkout-1')
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
+    assert counts(app, product_id) == (2, 3)
+
+
+def test_failed_requests_can_be_retried(app, client, customer, product_id):
+    assert checkout(client, customer[1], product_id, 'checkout-1', quantity=6).status_code == 400
+
+    with app.app_context():
+        db.session.get(Product, product_id).stock = 10
+        db.session.commit()
+    response = checkout(client, customer[1], product_id, 'checkout-1', quantity=6)
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
+
+
+def test_expired_keys_start_over(app, client, customer, product_id):
+    checkout(client, customer[1], product_id, 'checkout-1')
+    with app.app_context():
+        IdempotencyKey.query.update({'created_at': datetime.utcnow() - timedelta(days=2)})
+        db.session.commit()
+
+    response = checkout(client, customer[1], product_id, 'checkout-1', quantity=2)
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
+    assert counts(app, product_id) == (2, 2)
+
+    with app.app_context():
+        IdempotencyKey.query.update({'created_at': datetime.utcnow() - timedelta(days=2)})
+        db.session.commit()
+        assert idempotency.purge_expired() == 1
+
+
+def test_parallel_duplicates_place_one_order(app, customer, product_id):
+    def send(_):
+        return checkout(app.test_client(), customer[1], product_id, 'checkout-1')
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(send, range(16)))
+
+    assert [response.status_code for response in responses] == [201] * 16
+    assert sum('Idempotent-Replayed' not in response.headers for response in responses) == 1
+    assert counts(app, product_id) == (1, 4)
+
+
+@pytest.mark.parametrize('key', ['', 'k' * 256])
+def test_bad_keys(client, customer, product_id, key):
+    assert checkout(client, customer[1], product_id, key).status_code == 400
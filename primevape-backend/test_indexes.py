@@ -0,0 +1,84 @@
+"""
+Listing queries are served by the composite indexes declared in models.py
+
+Each endpoint is called once while its SQL is captured; the listing SELECT
+is then run through SQLite's EXPLAIN QUERY PLAN with the same parameters and
+the plan must name the expected index.
+"""
+
+import pytest
+from sqlalchemy import event
+from conftest import add_products
+from models import db
+
+
+@pytest.fixture
+def captured(app):
+    """List of (statement, parameters) executed while the fixture is active"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', capture)
+
+
+@pytest.fixture
+def catalog(app, client, customer, admin):
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    if dialect != 'sqlite':
+        pytest.skip('EXPLAIN QUERY PLAN checks are SQLite-specific')
+
+    product_ids = add_products(app, 10, featured=True)
+    response = client.post('/api/orders', headers=customer[1], json={
+        'items': [{'product_id': product_ids[0], 'quantity': 1}]
+    })
+    assert response.status_code == 201
+    client.post('/api/admin/products/stock', headers=admin[1], json={
+        'adjustments': [{'product_id': product_ids[0], 'delta': 5}]
+    })
+    return product_ids
+
+
+def query_plan(app, statement, parameters):
+    with app.app_context():
+        with db.engine.connect() as conn:
+            rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    return ' | '.join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize('path, role, table, index', [
+    ('/api/products', None, 'products', 'ix_products_active_created'),
+    ('/api/products?category=Pods', None, 'products', 'ix_products_active_category_created'),
+    ('/api/products?featured=true', None, 'products', 'ix_products_active_featured_created'),
+    ('/api/orders', 'customer', 'orders', 'ix_orders_user_created'),
+    ('/api/orders', 'customer', 'order_items', 'ix_order_items_order_id'),
+    ('/api/admin/orders?status=pending', 'admin', 'orders', 'ix_orders_status_created'),
+    ('/api/admin/orders?cursor=', 'admin', 'orders', 'ix_orders_created_at_id'),
+    ('/api/admin/users?cursor=', 'admin', 'users', 'ix_users_created_at_id'),
+    ('/api/admin/products/{product_id}/inventory', 'admin', 'inventory_adjustments',
+     'ix_inventory_adjustments_product_created'),
+])
+def test_listing_query_uses_index(app, client, catalog, customer, admin, captured,
+                                  path, role, table, index):
+    headers = {'customer': customer, 'admin': admin}[role][1] if role else {}
+    captured.clear()
+
+    response = client.get(path.format(product_id=catalog[0]), headers=headers)
+    assert response.status_code == 200
+
+    # The page query (not the COUNT) reading from the table
+    listings = [
+        (statement, parameters) for statement, parameters in captured
+        if statement.startswith('SELECT') and 'count(' not in statement
+        and f'FROM {table}' in statement
+    ]
+    assert listings, f'no listing query against {table}'
+
+    plan = query_plan(app, *listings[0])
+    assert index in plan, plan
@@ -0,0 +1,68 @@
+"""
+Both JSON engines encode responses identically, and row-tuple listings match
+the models' to_dict()
+"""
+
+import json
+from datetime import datetime
+from decimal import Decimal
+import pytest
+import json_provider
+from conftest import add_products
+from models import db, Product, Order, User
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def engine_client(request, app):
+    app.config['JSON_ENGINE'] = request.param
+    json_provider.init_app(app)
+    return app.test_client()
+
+
+def encoded(app, obj):
+    with app.app_context():
+        return json.loads(app.json.dumps(obj))
+
+
+def test_auto_prefers_orjson(app):
+    assert isinstance(app.json, json_provider.OrjsonProvider)
+
+
+def test_orjson_required_when_asked(app, monkeypatch):
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    app.config['JSON_ENGINE'] = 'orjson'
+    with pytest.raises(RuntimeError):
+        json_provider.init_app(app)
+
+    app.config['JSON_ENGINE'] = 'auto'
+    json_provider.init_app(app)
+    assert isinstance(app.json, json_provider.StdlibJSONProvider)
+
+
+def test_engines_write_the_same_values(app, engine_client):
+    value = {'at': datetime(2025, 3, 1, 12, 30, 5, 123456), 'price': Decimal('9.90')}
+    assert encoded(app, value) == {'at': '2025-03-01T12:30:05.123456', 'price': '9.90'}
+
+    product_id, = add_products(app, 1)
+    response = engine_client.get(f'/api/products/{product_id}')
+    assert response.mimetype == 'application/json'
+    created_at = response.get_json()['created_at']
+    assert datetime.fromisoformat(created_at)
+
+
+def test_listings_match_to_dict(app, engine_client, customer, admin):
+    product_ids = add_products(app, 3)
+    engine_client.post('/api/orders', headers=customer[1], json={
+        'items': [{'product_id': product_ids[0], 'quantity': 1}],
+        'shipping_address': {'street': '1 Main St', 'city': 'Town', 'state': 'TS', 'zip_code': '1', 'country': 'US'}
+    })
+
+    with app.app_context():
+        products = [product.to_dict() for product in db.session.query(Product).order_by(Product.id)]
+        orders = [order.to_dict() for order in db.session.query(Order)]
+        users = [user.to_dict() for user in db.session.query(User).order_by(User.id.desc())]
+
+    listed = engine_client.get('/api/products').get_json()['products']
+    assert sorted(listed, key=lambda product: product['id']) == encoded(app, products)
+    assert engine_client.get('/api/orders', headers=customer[1]).get_json()['orders'] == encoded(app, orders)
+    assert engine_client.get('/api/admin/users', headers=admin[1]).get_json()['users'] == encoded(app, users)
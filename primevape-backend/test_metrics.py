@@ -0,0 +1,36 @@
+"""
+/metrics reports request metrics without counting its own scrapes, and in
+production only serves scrapes carrying METRICS_TOKEN
+"""
+
+import pytest
+from app import create_app
+from config import ProductionConfig
+
+
+def test_scrapes_are_not_recorded(client):
+    client.get('/metrics')
+    client.get('/health')
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert 'route="/health"' in body
+    assert 'route="/metrics"' not in body
+
+
+@pytest.fixture
+def production_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(ProductionConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "prod.db"}')
+    monkeypatch.setattr(ProductionConfig, 'METRICS_TOKEN', None)
+    return create_app('production').test_client()
+
+
+def test_production_without_token_is_closed(production_client):
+    assert production_client.get('/metrics').status_code == 404
+
+
+def test_production_with_token_requires_it(production_client, monkeypatch):
+    monkeypatch.setitem(production_client.application.config, 'METRICS_TOKEN', 'secret')
+
+    assert production_client.get('/metrics').status_code == 401
+    response = production_client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
@@ -0,0 +1,46 @@
+"""
+Order listings load orders, items and product names in a fixed number of
+queries, however many rows the page holds
+"""
+
+import pytest
+from conftest import add_products, query_count
+
+
+@pytest.fixture
+def orders(client, customer, app):
+    product_ids = add_products(app, 6)
+    _, headers = customer
+    for i in range(25):
+        response = client.post('/api/orders', headers=headers, json={
+            'items': [
+                {'product_id': product_ids[i % 6], 'quantity': 1},
+                {'product_id': product_ids[(i + 1) % 6], 'quantity': 2},
+                {'product_id': product_ids[(i + 2) % 6], 'quantity': 1}
+            ]
+        })
+        assert response.status_code == 201
+
+
+@pytest.mark.parametrize('path, role', [
+    ('/api/orders', 'customer'),
+    ('/api/orders/admin/all', 'admin'),
+    ('/api/admin/orders', 'admin'),
+])
+def test_listing_queries_do_not_grow_with_page_size(client, orders, customer, admin, path, role):
+    headers = customer[1] if role == 'customer' else admin[1]
+
+    # Warm per-process caches (e.g. the token version check) first
+    client.get(f'{path}?per_page=1', headers=headers)
+
+    counts = {}
+    for per_page in (5, 20):
+        response = client.get(f'{path}?per_page={per_page}', headers=headers)
+        assert response.status_code == 200
+        body = response.get_json()
+        assert len(body['orders']) == per_page
+        assert all(len(order['items']) == 3 for order in body['orders'])
+        assert all(item['product_name'] for order in body['orders'] for item in order['items'])
+        counts[per_page] = query_count(response)
+
+    assert counts[5] == counts[20]
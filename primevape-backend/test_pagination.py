@@ -0,0 +1,75 @@
+"""
+Cursor (keyset) pagination walks a listing exactly once, newest first, and
+rejects tokens it didn't issue
+"""
+
+from datetime import datetime
+import pytest
+from conftest import add_products
+
+
+def walk(client, path, key, headers=None, per_page=3):
+    """Follow next_cursor to the end, returning the ids in order"""
+    ids = []
+    cursor = ''
+    while cursor is not None:
+        body = client.get(f'{path}?per_page={per_page}&cursor={cursor}', headers=headers).get_json()
+        ids.extend(row['id'] for row in body[key])
+        assert 'total' not in body
+        cursor = body['next_cursor']
+    return ids
+
+
+def test_walks_every_product_once_across_timestamp_ties(app, client):
+    # Two groups sharing a created_at; ties are broken by id
+    older = add_products(app, 4, created_at=datetime(2025, 1, 1))
+    newer = add_products(app, 5, created_at=datetime(2025, 6, 1))
+
+    assert walk(client, '/api/products', 'products') == sorted(newer, reverse=True) + sorted(older, reverse=True)
+
+
+def test_admin_listings_walk_with_cursor(app, client, customer, admin):
+    product_id, = add_products(app, 1)
+    for _ in range(7):
+        client.post('/api/orders', headers=customer[1], json={'items': [{'product_id': product_id, 'quantity': 1}]})
+
+    order_ids = walk(client, '/api/admin/orders', 'orders', admin[1])
+    assert order_ids == sorted(order_ids, reverse=True) and len(order_ids) == 7
+
+    user_ids = walk(client, '/api/admin/users', 'users', admin[1], per_page=1)
+    assert sorted(user_ids) == sorted([customer[0], admin[0]])
+
+
+def test_include_total(app, client):
+    add_products(app, 4)
+    body = client.get('/api/products?cursor=&per_page=2&include_total=true').get_json()
+
+    assert body['total'] == 4
+    assert len(body['products']) == 2
+    assert body['next_cursor']
+
+
+def test_page_numbers_still_work(app, client):
+    add_products(app, 5)
+    body = client.get('/api/products?page=2&per_page=2').get_json()
+
+    assert (body['total'], body['pages'], body['current_page']) == (5, 3, 2)
+    assert len(body['products']) == 2
+
+
+@pytest.mark.parametrize('path, role', [
+    ('/api/products', None),
+    ('/api/orders', 'customer'),
+    ('/api/admin/orders', 'admin'),
+    ('/api/admin/users', 'admin'),
+])
+def test_bad_cursor_is_400(client, customer, admin, path, role):
+    headers = {'customer': customer, 'admin': admin}[role][1] if role else None
+    response = client.get(f'{path}?cursor=not-a-cursor', headers=headers)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid cursor'
+
+
+def test_cursor_with_search_is_400(client):
+    assert client.get('/api/products?search=mango&cursor=').status_code == 400
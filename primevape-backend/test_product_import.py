@@ -0,0 +1,124 @@
+"""
+Bulk product import upserts by name from JSON, NDJSON or CSV, reports bad
+rows by number and still applies the rest
+"""
+
+import io
+import json
+import pytest
+import product_import
+from conftest import add_products
+from models import db, Product
+
+
+def run_import(client, admin, body, content_type):
+    return client.post('/api/admin/products/import', headers=admin[1], data=body, content_type=content_type)
+
+
+def products_by_name(app):
+    with app.app_context():
+        return {product.name: product for product in db.session.query(Product)}
+
+
+def test_json_upsert(app, client, admin):
+    add_products(app, 2)
+
+    response = run_import(client, admin, json.dumps([
+        {'name': 'Product 0', 'price': 99.5},
+        {'name': 'Fresh', 'description': 'New', 'price': '7.25', 'category': 'Pods', 'stock': '3', 'featured': 'yes'},
+    ]), 'application/json')
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert (summary['rows'], summary['created'], summary['updated'], summary['errors']) == (2, 1, 1, [])
+
+    products = products_by_name(app)
+    assert len(products) == 3
+    # Only the columns sent are changed
+    assert products['Product 0'].price == 99.5
+    assert products['Product 0'].stock == 50
+    assert products['Product 0'].description == 'Product 0 description'
+    fresh = products['Fresh']
+    assert (fresh.price, fresh.stock, fresh.featured, fresh.is_active, fresh.image) == (7.25, 3, True, True, '')
+
+
+def test_csv_blank_cells_are_not_provided(app, client, admin):
+    add_products(app, 1)
+    body = 'name,description,price,category,stock\nProduct 0,,12,,\nCsv,From CSV,4,Liquids,9\n'
+
+    summary = run_import(client, admin, body, 'text/csv').get_json()
+    assert (summary['created'], summary['updated'], summary['errors']) == (1, 1, [])
+
+    products = products_by_name(app)
+    assert products['Product 0'].price == 12
+    assert products['Product 0'].category == 'Liquids'
+    assert products['Csv'].stock == 9
+
+
+def test_per_row_errors(app, client, admin):
+    add_products(app, 1)
+    lines = [
+        json.dumps({'name': 'Product 0', 'stock': 5}),
+        '{not json',
+        json.dumps({'name': 'Bad', 'description': 'x', 'price': -1, 'category': 'Pods', 'stock': 1}),
+        json.dumps({'price': 1}),
+        json.dumps({'name': 'Partial', 'price': 1}),
+        json.dumps({'name': 'Good', 'description': 'x', 'price': 1, 'category': 'Pods', 'stock': 1}),
+    ]
+
+    summary = run_import(client, admin, '\n'.join(lines), 'application/x-ndjson').get_json()
+    assert (summary['rows'], summary['created'], summary['updated']) == (6, 1, 1)
+    errors = {error['row']: error['error'] for error in summary['errors']}
+    assert sorted(errors) == [2, 3, 4, 5]
+    assert errors[3].startswith('Invalid price')
+    assert errors[4] == 'Missing required field: name'
+    assert errors[5].startswith('Missing required field for a new product')
+
+    products = products_by_name(app)
+    assert set(products) == {'Product 0', 'Good'}
+    assert products['Product 0'].stock == 5
+
+
+def test_duplicate_names_are_not_guessed(app, client, admin):
+    add_products(app, 1)
+    with app.app_context():
+        db.session.add(Product(name='Product 0', description='', price=1, category='Pods', stock=1))
+        db.session.commit()
+
+    summary = run_import(client, admin, json.dumps([{'name': 'Product 0', 'stock': 0}]), 'application/json').get_json()
+    assert summary['updated'] == 0
+    assert '2 products are named' in summary['errors'][0]['error']
+
+
+def test_later_rows_win_across_batches(app):
+    rows = [{'name': 'Same', 'description': 'x', 'price': 1, 'category': 'Pods', 'stock': stock} for stock in range(5)]
+
+    with app.app_context():
+        summary = product_import.import_products(iter(rows), batch_size=2)
+    assert (summary['created'], summary['updated']) == (1, 2)
+
+    products = products_by_name(app)
+    assert len(products) == 1
+    assert products['Same'].stock == 4
+
+
+def test_file_upload_refreshes_catalog(app, client, admin):
+    assert client.get('/api/products').get_json()['total'] == 0
+
+    upload = (io.BytesIO(b'name,description,price,category,stock\nUploaded,x,1,Pods,2\n'), 'products.csv')
+    response = client.post('/api/admin/products/import', headers=admin[1],
+                           data={'file': upload}, content_type='multipart/form-data')
+    assert response.get_json()['created'] == 1
+
+    assert client.get('/api/products').get_json()['total'] == 1
+    assert client.get('/api/products?search=uploaded').get_json()['total'] == 1
+    assert client.get('/api/admin/stats', headers=admin[1]).get_json()['total_products'] == 1
+
+
+@pytest.mark.parametrize('body, content_type', [
+    ('', 'application/json'),
+    ('{"products": 1}', 'application/json'),
+    ('name', 'text/plain'),
+    ('[]', 'application/json'),
+])
+def test_bad_uploads(client, admin, body, content_type):
+    assert run_import(client, admin, body, content_type).status_code == 400
@@ -0,0 +1,45 @@
+"""
+Per-request SQL instrumentation: statement counts and timings, the test
+budget and fingerprints
+"""
+
+import copy
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from conftest import add_products, query_count
+from models import db
+from query_stats import QueryBudgetExceeded, fingerprint
+
+
+def test_server_timing_counts_statements(app, client):
+    add_products(app, 3)
+
+    response = client.get('/api/products?per_page=2')
+
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert query_count(response) > 0
+
+
+def test_budget_fails_requests_under_test(app, client):
+    add_products(app, 3)
+    app.config['SQL_QUERY_BUDGET'] = 0
+
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/api/products')
+
+
+def test_failed_statement_leaves_no_state_on_the_connection(app):
+    with app.app_context():
+        with db.engine.connect() as conn:
+            before = copy.deepcopy(dict(conn.info))
+            with pytest.raises(SQLAlchemyError):
+                conn.execute(text('SELECT * FROM no_such_table'))
+            conn.rollback()
+            conn.execute(text('SELECT 1'))
+            assert dict(conn.info) == before
+
+
+def test_fingerprint_folds_in_lists():
+    assert fingerprint('SELECT  *\n FROM t WHERE id IN (?, ?, ?)') == \
+        fingerprint('SELECT * FROM t WHERE id IN (?, ?)')
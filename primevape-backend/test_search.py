@@ -0,0 +1,63 @@
+"""
+Product search ranks name over category over description, matches words as
+prefixes and requires every word; the in-process index follows API writes
+"""
+
+from models import db, Product
+
+
+def add_product(app, name, category='Liquids', description=''):
+    with app.app_context():
+        product = Product(name=name, category=category, price=10.0, description=description, stock=5)
+        db.session.add(product)
+        db.session.commit()
+        return product.id
+
+
+def search(client, text, **params):
+    query = '&'.join(f'{key}={value}' for key, value in params.items())
+    body = client.get(f'/api/products?search={text}&{query}').get_json()
+    return [product['id'] for product in body['products']], body['total']
+
+
+def test_name_outranks_description(app, client):
+    in_description = add_product(app, 'Berry Blast', description='A hint of mango')
+    in_name = add_product(app, 'Mango Ice')
+    add_product(app, 'Cola')
+
+    assert search(client, 'mango') == ([in_name, in_description], 2)
+
+
+def test_prefixes_and_all_words(app, client):
+    mango_ice = add_product(app, 'Mango Ice')
+    add_product(app, 'Mango Peach')
+
+    assert search(client, 'mang')[1] == 2
+    assert search(client, 'mango%20ic') == ([mango_ice], 1)
+    assert search(client, 'mango%20grape') == ([], 0)
+
+
+def test_filters_and_pages_apply(app, client):
+    pods = add_product(app, 'Mango Pod', category='Pods')
+    add_product(app, 'Mango Juice', category='Liquids')
+    for i in range(3):
+        add_product(app, f'Mango Extra {i}')
+
+    assert search(client, 'mango', category='Pods') == ([pods], 1)
+    ids, total = search(client, 'mango', per_page=2, page=3)
+    assert (len(ids), total) == (1, 5)
+
+
+def test_index_follows_api_writes(app, client, admin):
+    product_id = add_product(app, 'Mango Ice')
+    assert search(client, 'mango')[1] == 1
+
+    client.put(f'/api/products/{product_id}', headers=admin[1], json={'name': 'Lychee Ice'})
+    assert search(client, 'mango')[1] == 0
+    assert search(client, 'lychee') == ([product_id], 1)
+
+    client.post('/api/products', headers=admin[1], json={'name': 'Lychee Pod', 'category': 'Pods', 'price': 5})
+    assert search(client, 'lychee')[1] == 2
+
+    client.delete(f'/api/products/{product_id}', headers=admin[1])
+    assert search(client, 'lychee')[1] == 1
@@ -0,0 +1,101 @@
+"""
+Admin stock adjustments apply relative deltas all-or-nothing and record each
+one in the inventory ledger
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from conftest import add_products
+from models import db, Product
+
+
+def adjust(client, admin, adjustments, **fields):
+    return client.post('/api/admin/products/stock', headers=admin[1], json={'adjustments': adjustments, **fields})
+
+
+def stock_of(app, product_id):
+    with app.app_context():
+        return db.session.get(Product, product_id).stock
+
+
+def ledger(client, admin, product_id):
+    response = client.get(f'/api/admin/products/{product_id}/inventory', headers=admin[1])
+    assert response.status_code == 200
+    return response.get_json()['adjustments']
+
+
+def test_deltas_are_applied_and_recorded(app, client, admin):
+    first, second = add_products(app, 2, stock=10)
+
+    response = adjust(client, admin, [
+        {'product_id': second, 'delta': -4, 'reference': 'count-7'},
+        {'product_id': first, 'delta': 5},
+        {'product_id': second, 'delta': 1},
+    ], reason='recount')
+    assert response.status_code == 200
+    assert response.get_json()['stock'] == [
+        {'product_id': first, 'stock': 15},
+        {'product_id': second, 'stock': 7},
+    ]
+    assert stock_of(app, first) == 15
+    assert stock_of(app, second) == 7
+
+    rows = ledger(client, admin, second)
+    assert [(row['delta'], row['stock_after']) for row in rows] == [(1, 7), (-4, 6)]
+    assert {row['reason'] for row in rows} == {'recount'}
+    assert [row['reference'] for row in rows] == [None, 'count-7']
+    assert {row['user_id'] for row in rows} == {admin[0]}
+
+
+def test_below_zero_rolls_back_everything(app, client, admin):
+    first, second = add_products(app, 2, stock=3)
+
+    response = adjust(client, admin, [
+        {'product_id': first, 'delta': 10},
+        {'product_id': second, 'delta': -2},
+        {'product_id': second, 'delta': -2},
+    ])
+    assert response.status_code == 409
+    assert response.get_json()['errors'] == [
+        {'index': 2, 'product_id': second, 'error': 'Adjustment would take stock below zero'}
+    ]
+    assert stock_of(app, first) == 3
+    assert stock_of(app, second) == 3
+    assert ledger(client, admin, first) == []
+
+
+def test_adjustments_refresh_the_catalog(app, client, admin):
+    product_id, = add_products(app, 1, stock=3)
+    assert client.get(f'/api/products/{product_id}').get_json()['stock'] == 3
+
+    adjust(client, admin, [{'product_id': product_id, 'delta': 4}])
+    assert client.get(f'/api/products/{product_id}').get_json()['stock'] == 7
+
+
+def test_parallel_adjustments_are_not_lost(app, admin):
+    product_id, = add_products(app, 1, stock=0)
+
+    def send(_):
+        return adjust(app.test_client(), admin, [{'product_id': product_id, 'delta': 1}]).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(send, range(40)))
+    assert statuses == [200] * 40
+    assert stock_of(app, product_id) == 40
+
+
+@pytest.mark.parametrize('adjustments, status', [
+    ([], 400),
+    ('nope', 400),
+    ([{'product_id': 1}], 400),
+    ([{'product_id': 'x', 'delta': 1}], 400),
+    ([{'product_id': 1, 'delta': 1}] * 1001, 400),
+    ([{'product_id': 999, 'delta': 1}], 404),
+])
+def test_bad_requests(client, admin, adjustments, status):
+    assert adjust(client, admin, adjustments).status_code == status
+
+
+def test_admin_only(app, client, customer):
+    product_id, = add_products(app, 1)
+    assert adjust(client, customer, [{'product_id': product_id, 'delta': 1}]).status_code == 403
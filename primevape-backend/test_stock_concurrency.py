@@ -0,0 +1,74 @@
+"""
+Concurrent checkouts never oversell and an order is only cancelled once
+
+Orders are fired from many threads at once against a product with little
+stock. Run with TEST_DATABASE_URL pointing at Postgres to exercise row
+locking there as well as SQLite's database lock.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from conftest import add_products
+from models import db, Product, Order
+
+STOCK = 20
+BUYERS = 150
+
+
+def fire(app, count, method, path, headers, json=None):
+    """Send count identical requests in parallel, returning the status codes"""
+    def send(_):
+        response = app.test_client().open(path, method=method, headers=headers, json=json)
+        return response.status_code
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        return list(pool.map(send, range(count)))
+
+
+def stock_of(app, product_id):
+    with app.app_context():
+        return db.session.get(Product, product_id).stock
+
+
+def test_parallel_orders_never_oversell(app, customer):
+    _, headers = customer
+    product_id, = add_products(app, 1, stock=STOCK)
+
+    statuses = fire(app, BUYERS, 'POST', '/api/orders', headers, {
+        'items': [{'product_id': product_id, 'quantity': 1}]
+    })
+
+    assert statuses.count(201) == STOCK
+    assert statuses.count(400) == BUYERS - STOCK
+    assert stock_of(app, product_id) == 0
+    with app.app_context():
+        assert Order.query.count() == STOCK
+
+
+def test_parallel_multi_unit_orders_never_go_negative(app, customer):
+    _, headers = customer
+    product_id, = add_products(app, 1, stock=STOCK)
+
+    statuses = fire(app, BUYERS, 'POST', '/api/orders', headers, {
+        'items': [{'product_id': product_id, 'quantity': 3}]
+    })
+
+    assert statuses.count(201) == STOCK // 3
+    assert stock_of(app, product_id) == STOCK % 3
+
+
+def test_concurrent_cancels_release_stock_once(app, client, customer):
+    _, headers = customer
+    product_id, = add_products(app, 1, stock=STOCK)
+    response = client.post('/api/orders', headers=headers, json={
+        'items': [{'product_id': product_id, 'quantity': 5}]
+    })
+    order_id = response.get_json()['order']['id']
+    assert stock_of(app, product_id) == STOCK - 5
+
+    statuses = fire(app, 20, 'POST', f'/api/orders/{order_id}/cancel', headers)
+
+    assert statuses.count(200) == 1
+    assert statuses.count(400) == 19
+    assert stock_of(app, product_id) == STOCK
+    with app.app_context():
+        assert db.session.get(Order, order_id).status == 'cancelled'
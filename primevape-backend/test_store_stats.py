@@ -0,0 +1,67 @@
+"""
+Dashboard counters follow every order and product write incrementally and
+always agree with a full recount
+"""
+
+import pytest
+from conftest import add_products, query_count
+from models import db, StoreStats
+
+
+def stats(client, admin):
+    response = client.get('/api/admin/stats', headers=admin[1])
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def recount(app):
+    with app.app_context():
+        values = StoreStats.compute()
+    return {**values, 'total_revenue': pytest.approx(values['total_revenue'])}
+
+
+def test_counters_follow_writes(app, client, customer, admin):
+    product_id, = add_products(app, 1)
+    stats(client, admin)  # Builds the row
+
+    order_ids = []
+    for _ in range(4):
+        response = client.post('/api/orders', headers=customer[1], json={
+            'items': [{'product_id': product_id, 'quantity': 1}]
+        })
+        order_ids.append(response.get_json()['order']['id'])
+
+    client.post(f'/api/orders/{order_ids[0]}/cancel', headers=customer[1])
+    client.put(f'/api/admin/orders/{order_ids[1]}/status', headers=admin[1], json={'status': 'shipped'})
+    client.put(f'/api/admin/orders/{order_ids[2]}/status', headers=admin[1], json={'status': 'cancelled'})
+    client.delete(f'/api/admin/orders/{order_ids[3]}', headers=admin[1])
+    response = client.post('/api/admin/products', headers=admin[1], json={
+        'name': 'New', 'description': '', 'category': 'Pods', 'price': 5, 'stock': 1
+    })
+    assert response.status_code == 201
+
+    body = stats(client, admin)
+    assert body == recount(app)
+    assert (body['total_orders'], body['pending_orders'], body['total_products']) == (3, 0, 2)
+    assert body['total_revenue'] == pytest.approx(10.0 + 5.99)
+
+
+def test_reading_stats_is_one_query(app, client, admin):
+    add_products(app, 3)
+    stats(client, admin)
+
+    response = client.get('/api/admin/stats', headers=admin[1])
+    assert query_count(response) == 1
+
+
+def test_reconcile_repairs_drift(app, client, admin):
+    add_products(app, 2)
+    stats(client, admin)
+    with app.app_context():
+        StoreStats.apply(orders=7, revenue=100.0)
+        db.session.commit()
+    assert stats(client, admin)['total_orders'] == 7
+
+    with app.app_context():
+        StoreStats.reconcile()
+    assert stats(client, admin) == recount(app)
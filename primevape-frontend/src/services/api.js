@@ -31,6 +31,18 @@ export const productsAPI = {
     return handleResponse(response);
   },
 
+  // Resolves { products: { [id]: product }, missing: [id] } in one request
+  getBatch: async (ids) => {
+    const response = await fetch(`${API_BASE_URL}/products/batch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ ids }),
+    });
+    return handleResponse(response);
+  },
+
   getCategories: async () => {
     const response = await fetch(`${API_BASE_URL}/products/categories`);
     return handleResponse(response);